@@ -0,0 +1,120 @@
+# Agregações vetorizadas dos resultados de WER (pandas/NumPy)
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from metrics import METRIC_FIELDS
+
+# Colunas de metadados do dataset usadas nos recortes do WER
+GROUP_DIMENSIONS = ("categoria", "fonte", "qt_vozes")
+
+
+def build_results_table(metrics: Dict[str, Dict[str, Dict[str, float]]],
+                        durations: Dict[str, float]) -> pd.DataFrame:
+    """
+    Monta a tabela longa e numérica dos resultados: uma linha por (áudio, motor)
+    com as métricas do par, o total de erros e a duração do áudio em segundos.
+    """
+    rows = [
+        {"ID Áudio": audio_name, "Modelo": label, **{field: record[field] for field in METRIC_FIELDS}}
+        for audio_name, records in metrics.items()
+        for label, record in records.items()
+    ]
+    df = pd.DataFrame(rows, columns=["ID Áudio", "Modelo", *METRIC_FIELDS])
+    df["errors"] = df["substitutions"] + df["deletions"] + df["insertions"]
+    df["duration"] = df["ID Áudio"].map(durations).astype(float)
+    return df
+
+
+def wer_by_audio(df: pd.DataFrame, labels: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Tabela larga (um áudio por linha, um motor por coluna) com o WER numérico
+    e a duração do áudio, na ordem em que os áudios aparecem em df.
+    """
+    wide = df.pivot(index="ID Áudio", columns="Modelo", values="wer")
+    wide = wide.reindex(index=pd.unique(df["ID Áudio"]), columns=list(labels) if labels else None)
+    wide["Duração (s)"] = df.groupby("ID Áudio", sort=False)["duration"].first()
+    wide.columns.name = None
+    return wide.reset_index()
+
+
+def engine_summary(df: pd.DataFrame, by: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Resumo por motor (e pelas colunas em by, se houver), calculado em um único groupby:
+    - WER médio ponderado pela duração (apenas áudios com duração conhecida)
+    - WER do corpus (micro-média: total de erros / total de palavras da referência)
+    - WER médio simples, mediana, número de arquivos e totais de erros e palavras
+    """
+    has_duration = df["duration"].notna()
+    weighted = df.assign(
+        wer_x_duration=np.where(has_duration, df["wer"] * df["duration"], 0.0),
+        weight=np.where(has_duration, df["duration"], 0.0),
+    )
+    grouped = weighted.groupby([*by, "Modelo"], sort=False).agg(
+        files=("wer", "size"),
+        wer_x_duration=("wer_x_duration", "sum"),
+        weight=("weight", "sum"),
+        errors=("errors", "sum"),
+        ref_words=("ref_words", "sum"),
+        mean_wer=("wer", "mean"),
+        median_wer=("wer", "median"),
+    )
+    summary = pd.DataFrame({
+        "files": grouped["files"],
+        "weighted_wer": grouped["wer_x_duration"] / grouped["weight"].replace(0, np.nan),
+        "corpus_wer": grouped["errors"] / grouped["ref_words"].replace(0, np.nan),
+        "mean_wer": grouped["mean_wer"],
+        "median_wer": grouped["median_wer"],
+        "errors": grouped["errors"],
+        "ref_words": grouped["ref_words"],
+        "duration": grouped["weight"],
+    })
+    return summary.reset_index()
+
+
+def grouped_summary(df: pd.DataFrame, metadata: pd.DataFrame,
+                    dimensions: Sequence[str] = GROUP_DIMENSIONS) -> pd.DataFrame:
+    """
+    WER por motor dentro de cada grupo de metadados (categoria, fonte,
+    quantidade de vozes...). A tabela de resultados é unida aos metadados,
+    empilhada em formato longo (uma linha por par e dimensão) e resumida em um
+    único groupby por (dimensão, grupo, motor), com as mesmas colunas de engine_summary.
+    metadata: uma linha por "ID Áudio" com as colunas das dimensões.
+    """
+    joined = df.merge(metadata[list(dimensions)], left_on="ID Áudio", right_index=True, how="left")
+    stacked = joined.melt(
+        id_vars=["ID Áudio", "Modelo", "wer", "errors", "ref_words", "duration"],
+        value_vars=list(dimensions), var_name="Dimensão", value_name="Grupo",
+    )
+    stacked["Grupo"] = stacked["Grupo"].astype(object).where(stacked["Grupo"].notna(), "Sem informação").astype(str)
+    summary = engine_summary(stacked, by=["Dimensão", "Grupo"])
+    return summary.sort_values(["Dimensão", "Grupo"], kind="stable").reset_index(drop=True)
+
+
+def term_summary(df_terms: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    Soma as ocorrências de termos médicos (ver wer_test.term_results_batch)
+    pelas colunas keys e calcula o recall (reconhecidos / na referência) e a
+    precisão (reconhecidos / na hipótese) de termos.
+    """
+    grouped = df_terms.groupby(keys, sort=True)[["ref_terms", "hyp_terms", "matched_terms"]].sum()
+    grouped["term_recall"] = grouped["matched_terms"] / grouped["ref_terms"].replace(0, np.nan)
+    grouped["term_precision"] = grouped["matched_terms"] / grouped["hyp_terms"].replace(0, np.nan)
+    return grouped.reset_index()
+
+
+def format_percent(df: pd.DataFrame, columns: Iterable[str], suffix: bool = True) -> pd.DataFrame:
+    """
+    Formata colunas de taxas (0-1) como porcentagem com duas casas, apenas na exportação.
+    Com suffix=True gera strings "12.34%"; caso contrário, números 12.34.
+    """
+    formatted = df.copy()
+    for column in columns:
+        values = (formatted[column] * 100).round(2)
+        if suffix:
+            formatted[column] = values.map(lambda value: f"{value}%", na_action='ignore')
+        else:
+            formatted[column] = values
+    return formatted
@@ -0,0 +1,136 @@
+# Alinhamento palavra a palavra em memória linear (Hirschberg + colunas bit-paralelas)
+
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from edit_distance import advance_columns, build_peq, myers_vectors
+
+# Operação: (tipo, índice na referência, índice na hipótese)
+# tipo em 'equal', 'substitute', 'delete', 'insert' (mesmos nomes do jiwer)
+Operation = Tuple[str, Optional[int], Optional[int]]
+
+# Subproblemas com até esta quantidade de células (linhas x colunas) são
+# alinhados numa única passagem guardando dois vetores de bits por coluna
+# (~32 MB no limite); acima disso o Hirschberg divide o problema e a
+# memória continua linear no tamanho das transcrições
+BASE_CASE_CELLS = 1 << 27
+
+
+def _last_column(ref_ids: Sequence[int], hyp_ids: Sequence[int]) -> List[int]:
+    """
+    Retorna D[i][n] para i = 0..m, onde n = len(hyp_ids), reconstruindo a
+    última coluna da programação dinâmica a partir dos vetores de Myers.
+    """
+    m = len(ref_ids)
+    if m == 0:
+        return [len(hyp_ids)]
+    pv, mv, _ = myers_vectors(ref_ids, hyp_ids)
+    pv_bits = format(pv, f'0{m}b')[::-1]
+    mv_bits = format(mv, f'0{m}b')[::-1]
+    deltas = [(p == '1') - (q == '1') for p, q in zip(pv_bits, mv_bits)]
+    return list(accumulate(deltas, initial=len(hyp_ids)))
+
+
+def _align_base(ref_ids: Sequence[int], hyp_ids: Sequence[int],
+                ref_offset: int, hyp_offset: int, ops: List[Operation],
+                peq: Optional[Dict[int, int]] = None) -> None:
+    """
+    Alinhamento de um subproblema que cabe em BASE_CASE_CELLS: uma passagem
+    de Myers guardando os vetores (d0, pv) de cada coluna e o caminho
+    reconstruído do fim para o início em O(m + n) testes de bits.
+    Em empates prefere acerto/substituição, depois deleção, depois inserção.
+    """
+    m = len(ref_ids)
+    columns: List[Tuple[int, int]] = []
+    advance_columns(peq if peq is not None else build_peq(ref_ids), m, (1 << m) - 1, 0, m, hyp_ids, columns)
+
+    i, j = m, len(hyp_ids)
+    backtrace = []
+    while i > 0 and j > 0:
+        if ref_ids[i - 1] == hyp_ids[j - 1]:
+            backtrace.append(('equal', ref_offset + i - 1, hyp_offset + j - 1))
+            i, j = i - 1, j - 1
+            continue
+        d0, pv = columns[j - 1]
+        bit = 1 << (i - 1)
+        if not d0 & bit:  # D[i][j] == D[i-1][j-1] + 1
+            backtrace.append(('substitute', ref_offset + i - 1, hyp_offset + j - 1))
+            i, j = i - 1, j - 1
+        elif pv & bit:  # D[i][j] == D[i-1][j] + 1
+            backtrace.append(('delete', ref_offset + i - 1, None))
+            i -= 1
+        else:
+            backtrace.append(('insert', None, hyp_offset + j - 1))
+            j -= 1
+    backtrace.extend(('delete', ref_offset + k, None) for k in reversed(range(i)))
+    backtrace.extend(('insert', None, hyp_offset + k) for k in reversed(range(j)))
+    ops.extend(reversed(backtrace))
+
+
+def _hirschberg(ref_ids: Sequence[int], hyp_ids: Sequence[int],
+                ref_offset: int, hyp_offset: int, ops: List[Operation]) -> None:
+    m, n = len(ref_ids), len(hyp_ids)
+    if m == 0:
+        ops.extend(('insert', None, hyp_offset + j) for j in range(n))
+        return
+    if n == 0:
+        ops.extend(('delete', ref_offset + i, None) for i in range(m))
+        return
+    if n == 1 or m * n <= BASE_CASE_CELLS:
+        _align_base(ref_ids, hyp_ids, ref_offset, hyp_offset, ops)
+        return
+
+    # Divide a hipótese ao meio e acha o ponto de corte ótimo na referência
+    mid = n // 2
+    forward = _last_column(ref_ids, hyp_ids[:mid])
+    backward = _last_column(ref_ids[::-1], hyp_ids[:mid - 1:-1])
+    split = min(range(m + 1), key=lambda i: forward[i] + backward[m - i])
+    del forward, backward
+
+    _hirschberg(ref_ids[:split], hyp_ids[:mid], ref_offset, hyp_offset, ops)
+    _hirschberg(ref_ids[split:], hyp_ids[mid:], ref_offset + split, hyp_offset + mid, ops)
+
+
+def align_words(ref_ids: Sequence[int], hyp_ids: Sequence[int],
+                peq: Optional[Dict[int, int]] = None) -> List[Operation]:
+    """
+    Retorna a lista de operações (acertos, substituições, deleções e inserções)
+    de um alinhamento ótimo entre referência e hipótese.
+
+    Pares com até BASE_CASE_CELLS células saem de uma única passagem do motor
+    bit-paralelo (mesmo custo da distância) mais a reconstrução do caminho;
+    maiores são divididos pelo método de Hirschberg, então o pico de memória
+    é linear no tamanho das transcrições (nunca a matriz m x n).
+    peq é a tabela da referência (edit_distance.build_peq), reaproveitada
+    quando a mesma referência é alinhada com várias hipóteses.
+    """
+    ops: List[Operation] = []
+    m, n = len(ref_ids), len(hyp_ids)
+    if m and n and m * n <= BASE_CASE_CELLS:
+        _align_base(ref_ids, hyp_ids, 0, 0, ops, peq)
+    else:
+        _hirschberg(list(ref_ids), list(hyp_ids), 0, 0, ops)
+    return ops
+
+
+if __name__ == "__main__":
+    # Benchmark de memória: o pico cresce com os vetores das colunas até
+    # BASE_CASE_CELLS e depois linearmente com o tamanho, enquanto a matriz
+    # completa cresceria de forma quadrática.
+    import random
+    import tracemalloc
+
+    random.seed(0)
+    for size in (1000, 2000, 4000, 8000, 16000):
+        ref = [random.randrange(3000) for _ in range(size)]
+        hyp = [t if random.random() > 0.15 else random.randrange(3000) for t in ref]
+
+        tracemalloc.start()
+        operations = align_words(ref, hyp)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        full_matrix_mb = (size + 1) ** 2 * 8 / 2 ** 20
+        print(f"{size:>6} palavras: pico {peak / 2 ** 20:6.2f} MB "
+              f"({peak / size:6.0f} B/palavra), matriz completa ~{full_matrix_mb:8.1f} MB, "
+              f"{len(operations)} operações")
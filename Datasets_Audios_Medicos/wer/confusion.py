@@ -0,0 +1,117 @@
+# Índice de confusões (substituições, deleções e inserções) por motor, sobre IDs do vocabulário
+
+import heapq
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from alignment import Operation
+from vocabulary import Vocabulary
+
+SUBSTITUTION, DELETION, INSERTION = 'substitution', 'deletion', 'insertion'
+
+# Par (palavra da referência, palavra da IA); None marca o lado ausente
+WordPair = Tuple[Optional[str], Optional[str]]
+
+
+def pack(ref_id: Optional[int], hyp_id: Optional[int]) -> int:
+    """
+    Empacota o par de IDs em um único inteiro (chave esparsa); 0 marca o lado ausente.
+    """
+    return ((0 if ref_id is None else ref_id + 1) << 32) | (0 if hyp_id is None else hyp_id + 1)
+
+
+def unpack(key: int) -> Tuple[Optional[int], Optional[int]]:
+    ref, hyp = key >> 32, key & 0xFFFFFFFF
+    return (ref - 1 if ref else None), (hyp - 1 if hyp else None)
+
+
+def kind_of(key: int) -> str:
+    """
+    Tipo do evento de uma chave: substituição, deleção ou inserção.
+    """
+    ref_id, hyp_id = unpack(key)
+    if ref_id is None:
+        return INSERTION
+    return DELETION if hyp_id is None else SUBSTITUTION
+
+
+def count_confusions(ops: Iterable[Operation], ref_ids, hyp_ids, counts: Optional[Counter] = None) -> Counter:
+    """
+    Conta os eventos de erro de um alinhamento em uma passagem (linear no número de operações).
+    """
+    counts = Counter() if counts is None else counts
+    for op, i, j in ops:
+        if op != 'equal':
+            counts[pack(None if i is None else ref_ids[i], None if j is None else hyp_ids[j])] += 1
+    return counts
+
+
+def to_word_pairs(counts: Counter, vocabulary: Vocabulary) -> Dict[WordPair, int]:
+    """
+    Converte as chaves de IDs em pares de palavras (para sair de um processo do pool,
+    cujo vocabulário é diferente do processo principal).
+    """
+    words = vocabulary.words
+    pairs = {}
+    for key, count in counts.items():
+        ref_id, hyp_id = unpack(key)
+        pairs[(None if ref_id is None else words[ref_id], None if hyp_id is None else words[hyp_id])] = count
+    return pairs
+
+
+class ConfusionIndex:
+    """
+    Contagens esparsas de eventos de erro por motor: para cada motor, um
+    Counter de chaves empacotadas (ID da referência, ID da IA). Só pares
+    que realmente ocorreram ocupam memória.
+    """
+
+    def __init__(self, vocabulary: Vocabulary):
+        self.vocabulary = vocabulary
+        self.counts: Dict[str, Counter] = {}
+
+    def add(self, label: str, counts: Mapping[int, int]) -> None:
+        """
+        Soma contagens de chaves empacotadas (IDs deste vocabulário) ao motor.
+        """
+        self.counts.setdefault(label, Counter()).update(counts)
+
+    def add_word_pairs(self, label: str, pairs: Mapping[WordPair, int]) -> None:
+        """
+        Soma contagens de pares de palavras (vindas de outro processo) ao motor.
+        """
+        intern = self.vocabulary.intern
+        engine = self.counts.setdefault(label, Counter())
+        for (ref_word, hyp_word), count in pairs.items():
+            engine[pack(None if ref_word is None else intern(ref_word),
+                        None if hyp_word is None else intern(hyp_word))] += count
+
+    def top_k(self, label: str, k: int = 20, kind: Optional[str] = None) -> List[Tuple[Optional[str], Optional[str], int]]:
+        """
+        Os k eventos mais frequentes do motor (opcionalmente de um só tipo),
+        como (palavra da referência, palavra da IA, ocorrências).
+        """
+        items = self.counts.get(label, Counter()).items()
+        if kind is not None:
+            items = [(key, count) for key, count in items if kind_of(key) == kind]
+        words = self.vocabulary.words
+        result = []
+        for key, count in heapq.nlargest(k, items, key=lambda item: item[1]):
+            ref_id, hyp_id = unpack(key)
+            result.append((None if ref_id is None else words[ref_id], None if hyp_id is None else words[hyp_id], count))
+        return result
+
+    def to_frame(self, k: Optional[int] = None) -> pd.DataFrame:
+        """
+        Tabela longa (motor, tipo, palavra da referência, palavra da IA,
+        ocorrências), com os k eventos mais frequentes de cada motor e tipo
+        (todos, se k for None), em ordem decrescente de ocorrências.
+        """
+        rows = []
+        for label, counts in self.counts.items():
+            for kind in (SUBSTITUTION, DELETION, INSERTION):
+                for ref_word, hyp_word, count in self.top_k(label, k or len(counts), kind):
+                    rows.append((label, kind, ref_word, hyp_word, count))
+        return pd.DataFrame(rows, columns=["Modelo", "Tipo", "Referência", "IA", "Ocorrências"])
@@ -0,0 +1,206 @@
+# Distância de edição por palavras: rapidfuzz (C++) para a distância/WER e
+# Myers/Hyyrö bit-paralelo para os vetores do alinhamento e do WER incremental
+
+from array import array
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from rapidfuzz.distance import Levenshtein
+
+from vocabulary import Vocabulary
+
+# IDs a partir de U+D800 são deslocados para depois da faixa dos substitutos,
+# que não pode aparecer em uma str; acima de MAX_TEXT_ID, compara listas de inteiros
+_SURROGATES = 0xD800
+_SURROGATE_RANGE = 0x800
+MAX_TEXT_ID = 0x10FFFF - _SURROGATE_RANGE
+
+
+def encode_tokens(ref_words: Sequence[str], hyp_words: Sequence[str],
+                  vocabulary: Optional[Vocabulary] = None) -> Tuple[array, array]:
+    """
+    Converte as palavras da referência e da hipótese em arrays de IDs int32
+    de um mesmo vocabulário, para que a comparação de tokens seja entre inteiros.
+    Sem vocabulary, usa um vocabulário novo só para o par.
+    """
+    vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+    return vocabulary.encode(ref_words), vocabulary.encode(hyp_words)
+
+
+def ids_to_text(ids: Union[str, Sequence[int]]) -> Union[str, List[int]]:
+    """
+    Representa uma sequência de IDs como uma str com um caractere por token,
+    para que o rapidfuzz compare tokens pelo caminho nativo de strings (sem
+    hashing de objetos Python). Strings passam direto.
+    """
+    if isinstance(ids, str):
+        return ids
+    codes = np.asarray(ids, dtype=np.int64)
+    if codes.size and codes.max() > MAX_TEXT_ID:
+        return [int(token) for token in ids]
+    codes = codes.astype('<u4')
+    codes += (codes >= _SURROGATES).astype('<u4') * np.uint32(_SURROGATE_RANGE)
+    return codes.tobytes().decode('utf-32-le')
+
+
+def _word_texts(reference: str, hypotheses: Sequence[str]) -> Tuple[Union[str, List[int]], List, int]:
+    """
+    Tokeniza a referência e as hipóteses em IDs locais (posição da palavra
+    entre as palavras distintas da referência; palavras ausentes dela viram
+    um único ID extra, pois nunca coincidem com a referência) e as converte
+    com ids_to_text. Retorna (referência, hipóteses, palavras da referência).
+    """
+    ref_words = reference.split()
+    index = {word: token for token, word in enumerate(dict.fromkeys(ref_words))}
+    absent = len(index)
+    ref_text = ids_to_text(np.fromiter(map(index.__getitem__, ref_words), dtype=np.int64, count=len(ref_words)))
+    hyp_texts = []
+    for hypothesis in hypotheses:
+        hyp_words = hypothesis.split()
+        hyp_ids = np.fromiter(map(index.get, hyp_words, repeat(absent)), dtype=np.int64, count=len(hyp_words))
+        hyp_texts.append(ids_to_text(hyp_ids))
+    return ref_text, hyp_texts, len(ref_words)
+
+
+def build_peq(ref_ids: Sequence[int]) -> Dict[int, int]:
+    """
+    Monta a tabela de máscaras de igualdade (Peq) da referência:
+    para cada token, um inteiro com o bit i ligado onde ref_ids[i] == token.
+    """
+    positions: Dict[int, List[int]] = {}
+    for i, token in enumerate(ref_ids):
+        positions.setdefault(token, []).append(i)
+
+    peq = {}
+    for token, idx in positions.items():
+        mask = 0
+        for i in idx:
+            mask |= 1 << i
+        peq[token] = mask
+    return peq
+
+
+def myers_vectors(ref_ids: Sequence[int], hyp_ids: Sequence[int],
+                  peq: Optional[Dict[int, int]] = None) -> Tuple[int, int, int]:
+    """
+    Executa o algoritmo bit-paralelo de Myers (variante global de Hyyrö) e
+    retorna (pv, mv, distância). pv/mv são os deltas verticais +1/-1 da última
+    coluna da matriz de programação dinâmica.
+
+    A referência inteira vira um vetor de bits (inteiro do Python), então cada
+    palavra da hipótese custa O(n/w) operações em vez de O(n).
+    """
+    m = len(ref_ids)
+    if m == 0:
+        return 0, 0, len(hyp_ids)
+    if peq is None:
+        peq = build_peq(ref_ids)
+
+    # Coluna inicial D[i][0] = i: todos os deltas verticais +1
+    return advance_columns(peq, m, (1 << m) - 1, 0, m, hyp_ids)
+
+
+def advance_columns(peq: Dict[int, int], m: int, pv: int, mv: int, score: int,
+                    hyp_ids: Sequence[int], history: Optional[List[Tuple[int, int]]] = None) -> Tuple[int, int, int]:
+    """
+    Avança o estado (pv, mv, distância) de Myers pelas colunas de hyp_ids.
+    Permite continuar o cálculo de onde parou quando a hipótese cresce
+    (ver incremental.IncrementalWER). m é o tamanho da referência (> 0).
+    Com history (lista), acrescenta a ela (d0, pv) de cada coluna: d0 marca as
+    células com delta diagonal 0 (D[i][j] == D[i-1][j-1]) e pv os deltas
+    verticais +1, o bastante para reconstruir o alinhamento sem outra
+    passagem (ver alignment.py).
+    """
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+
+    for token in hyp_ids:
+        eq = peq.get(token, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ((xh | pv) ^ mask)
+        mh = pv & xh
+
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+
+        # Linha 0 cresce +1 a cada coluna (D[0][j] = j), por isso entra 1 em ph
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | ((xv | ph) ^ mask)
+        mv = ph & xv
+        if history is not None:
+            history.append((xh | xv, pv))
+
+    return pv, mv, score
+
+
+def edit_distance(ref_ids: Union[str, Sequence[int]], hyp_ids: Union[str, Sequence[int]],
+                  score_cutoff: Optional[int] = None) -> int:
+    """
+    Distância de Levenshtein entre duas sequências de IDs (ou duas strings),
+    calculada pelo rapidfuzz sobre ids_to_text. score_cutoff deve ser um
+    limite superior já comprovado da distância: o rapidfuzz restringe o
+    cálculo a uma faixa da matriz e o resultado continua exato.
+    """
+    return Levenshtein.distance(ids_to_text(ref_ids), ids_to_text(hyp_ids), score_cutoff=score_cutoff)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Retorna o WER entre duas strings já normalizadas (palavras separadas por espaço).
+    Segue a convenção do jiwer para referência vazia (divide por 1).
+    """
+    return batch_word_error_rate(reference, [hypothesis])[0]
+
+
+def batch_word_error_rate(reference: str, hypotheses: Sequence[str]) -> List[float]:
+    """
+    Calcula o WER de várias hipóteses contra a mesma referência.
+    A referência é tokenizada uma única vez.
+    """
+    ref_text, hyp_texts, ref_words = _word_texts(reference, hypotheses)
+    denominator = max(ref_words, 1)
+    return [Levenshtein.distance(ref_text, hyp_text) / denominator for hyp_text in hyp_texts]
+
+
+if __name__ == "__main__":
+    # Benchmark contra o jiwer em transcrições sintéticas longas (melhor de 5 execuções)
+    import random
+    import time
+
+    from jiwer import wer
+
+    def best_time(function, repeats: int = 5) -> float:
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    random.seed(0)
+    words = [f"palavra{i}" for i in range(2000)]
+    reference = [random.choice(words) for _ in range(12000)]
+    hypothesis = [w if random.random() > 0.15 else random.choice(words) for w in reference]
+    hypothesis = [w for w in hypothesis if random.random() > 0.05]
+    ref_text, hyp_text = " ".join(reference), " ".join(hypothesis)
+
+    expected, result = wer(ref_text, hyp_text), word_error_rate(ref_text, hyp_text)
+    assert result == expected, (result, expected)
+    jiwer_time = best_time(lambda: wer(ref_text, hyp_text))
+    native_time = best_time(lambda: word_error_rate(ref_text, hyp_text))
+
+    # Caminho do wer_test: transcrições já tokenizadas em IDs do vocabulário
+    ref_ids, hyp_ids = encode_tokens(ref_text.split(), hyp_text.split())
+    ids_time = best_time(lambda: edit_distance(ref_ids, hyp_ids))
+    # Myers em Python, usado só onde os vetores são necessários (alinhamento, WER incremental)
+    myers_time = best_time(lambda: myers_vectors(ref_ids, hyp_ids), repeats=1)
+
+    print(f"jiwer:             {expected:.6f} em {jiwer_time * 1000:.1f} ms")
+    print(f"texto (rapidfuzz): {result:.6f} em {native_time * 1000:.1f} ms ({jiwer_time / native_time:.1f}x o jiwer)")
+    print(f"IDs (rapidfuzz):   {ids_time * 1000:.1f} ms ({jiwer_time / ids_time:.1f}x o jiwer)")
+    print(f"Myers em Python:   {myers_time * 1000:.1f} ms ({len(hyp_ids)} colunas de {len(ref_ids)} bits)")
@@ -0,0 +1,129 @@
+# WER incremental (online) para hipóteses que crescem durante a transcrição ao vivo
+
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+from edit_distance import advance_columns, build_peq
+
+
+class ScorerState(NamedTuple):
+    pv: int
+    mv: int
+    errors: int
+    hyp_words: int
+
+
+class IncrementalWER:
+    """
+    Pontuador de WER para uma hipótese que cresce palavra a palavra contra uma
+    referência fixa. Guarda apenas a última coluna da programação dinâmica
+    (vetores pv/mv do motor bit-paralelo de Myers), então acrescentar k
+    palavras custa O(k * n / w), sem recalcular a hipótese inteira.
+
+    O texto recebido deve estar normalizado como a referência; com normalize,
+    cada trecho é normalizado antes de entrar (regras que atravessam dois
+    trechos, como "500" + "mg", não são recompostas).
+    """
+
+    def __init__(self, reference: str, normalize: Optional[Callable[[str], str]] = None):
+        self.normalize = normalize
+        # palavra -> ID da referência; palavras fora da referência recebem -1 e nunca casam
+        self._ids: Dict[str, int] = {}
+        ref_ids = [self._ids.setdefault(word, len(self._ids))
+                   for word in (normalize(reference) if normalize else reference).split()]
+        self._peq = build_peq(ref_ids)
+        self.ref_words = len(ref_ids)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Volta à hipótese vazia (distância = tamanho da referência).
+        """
+        m = self.ref_words
+        self._state = ScorerState((1 << m) - 1, 0, m, 0)
+
+    @property
+    def errors(self) -> int:
+        return self._state.errors
+
+    @property
+    def hyp_words(self) -> int:
+        return self._state.hyp_words
+
+    @property
+    def wer(self) -> float:
+        """
+        WER atual (erros / palavras da referência; divide por 1 se a referência for vazia, como o jiwer).
+        """
+        return self._state.errors / max(self.ref_words, 1)
+
+    def _advance(self, state: ScorerState, text: str) -> ScorerState:
+        words = (self.normalize(text) if self.normalize else text).split()
+        if not words:
+            return state
+        if self.ref_words == 0:
+            return ScorerState(0, 0, state.errors + len(words), state.hyp_words + len(words))
+        ids = self._ids
+        pv, mv, errors = advance_columns(self._peq, self.ref_words, state.pv, state.mv, state.errors,
+                                         [ids.get(word, -1) for word in words])
+        return ScorerState(pv, mv, errors, state.hyp_words + len(words))
+
+    def append(self, text: str) -> float:
+        """
+        Acrescenta palavras definitivas à hipótese e retorna o WER atualizado.
+        """
+        self._state = self._advance(self._state, text)
+        return self.wer
+
+    def extend(self, texts: Iterable[str]) -> float:
+        """
+        Acrescenta vários trechos em sequência e retorna o WER final.
+        """
+        for text in texts:
+            self.append(text)
+        return self.wer
+
+    def peek(self, text: str) -> float:
+        """
+        WER que a hipótese teria com text acrescentado, sem alterar o estado.
+        Útil para resultados parciais (ainda instáveis) dos motores de streaming.
+        """
+        return self._advance(self._state, text).errors / max(self.ref_words, 1)
+
+    def snapshot(self) -> ScorerState:
+        """
+        Estado atual (quatro inteiros), para restaurar depois com restore().
+        """
+        return self._state
+
+    def restore(self, state: ScorerState) -> None:
+        self._state = state
+
+
+if __name__ == "__main__":
+    # Sessão ao vivo simulada: recalcular o WER a cada parcial x pontuador incremental
+    import random
+    import time
+
+    from edit_distance import word_error_rate
+
+    random.seed(0)
+    vocabulary = [f"palavra{i}" for i in range(500)]
+    reference = [random.choice(vocabulary) for _ in range(3000)]
+    hypothesis = [w if random.random() > 0.15 else random.choice(vocabulary) for w in reference]
+    partials = [' '.join(hypothesis[i:i + 5]) for i in range(0, len(hypothesis), 5)]
+    ref_text = ' '.join(reference)
+
+    start = time.perf_counter()
+    recomputed = []
+    for k in range(1, len(partials) + 1):
+        recomputed.append(word_error_rate(ref_text, ' '.join(partials[:k])))
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scorer = IncrementalWER(ref_text)
+    incremental = [scorer.append(partial) for partial in partials]
+    incremental_time = time.perf_counter() - start
+
+    assert all(abs(a - b) < 1e-12 for a, b in zip(recomputed, incremental))
+    print(f"{len(partials)} parciais: recálculo completo {full_time:.2f} s, "
+          f"incremental {incremental_time * 1000:.1f} ms (WER final {incremental[-1]:.4f})")
@@ -4,9 +4,10 @@ import numpy
 import os
 from openai import project
 import pandas as pd
-import json
 from typing import Dict, Union
 
+from manifest import build_manifest
+
 
 def get_statistics(json_file_path: str, manual_transcription_file: str) -> Dict[str, Union[int, float, list, dict]]:
 
@@ -32,29 +33,30 @@ def get_statistics(json_file_path: str, manual_transcription_file: str) -> Dict[
     if not os.path.exists(manual_folder_path):
         raise FileNotFoundError(f"Diretório não encontrado: {manual_folder_path}")
 
-    for json_file in os.listdir(json_folder_path):
-        if json_file.endswith('.json'):
+    # Metadados e contagem de palavras vêm do manifest (reaproveitado entre execuções)
+    audios = build_manifest(metadata_folder=json_file_path, extra_folders=[manual_transcription_file],
+                            word_count_folders=[manual_transcription_file])
+
+    for audio in audios.values():
+        files = audio['files']
+        if json_file_path in files:
             file_count += 1
-            with open(os.path.join(json_folder_path, json_file), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                time_count += data.get('duracao', 0)
-                
-                # Coletar informações sobre categorias e fontes
-                categoria = data.get('categoria', 'Não especificada')
-                fonte = data.get('fonte', 'Não especificada')
-                
-                categories.add(categoria)
-                sources.add(fonte)
-                
-                # Contar ocorrências de cada categoria e fonte
-                category_count[categoria] = category_count.get(categoria, 0) + 1
-                source_count[fonte] = source_count.get(fonte, 0) + 1
-
-    for transcription_file in os.listdir(manual_folder_path):
-        if transcription_file.endswith('.txt'):
-            with open(os.path.join(manual_folder_path, transcription_file), 'r', encoding='utf-8') as f:
-                text = f.read()
-                word_count += len(text.split())
+            time_count += audio.get('duracao') or 0
+
+            # Coletar informações sobre categorias e fontes
+            categoria = audio.get('categoria') or 'Não especificada'
+            fonte = audio.get('fonte') or 'Não especificada'
+
+            categories.add(categoria)
+            sources.add(fonte)
+
+            # Contar ocorrências de cada categoria e fonte
+            category_count[categoria] = category_count.get(categoria, 0) + 1
+            source_count[fonte] = source_count.get(fonte, 0) + 1
+
+        manual = files.get(manual_transcription_file)
+        if manual and manual['path'].endswith('.txt'):
+            word_count += manual['word_count']
 
     return {
         "file_count": file_count,
@@ -0,0 +1,108 @@
+# Localização de termos médicos (léxico configurável) com um autômato de Aho-Corasick por palavras
+
+import os
+from collections import Counter, deque
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "medical_lexicon.txt")
+
+
+def load_lexicon(lexicon_path: str = DEFAULT_LEXICON_PATH,
+                 normalize: Optional[Callable[[str], str]] = None) -> List[Tuple[str, ...]]:
+    """
+    Lê o léxico (um termo por linha; linhas vazias e iniciadas por '#' são
+    ignoradas) e retorna cada termo como uma tupla de palavras, sem repetições.
+    normalize deve ser a mesma normalização aplicada às transcrições.
+    """
+    terms = {}
+    with open(lexicon_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            words = tuple((normalize(line) if normalize else line).split())
+            if words:
+                terms.setdefault(words, None)
+    return list(terms)
+
+
+class TermMatcher:
+    """
+    Autômato de Aho-Corasick sobre palavras (ou seus IDs do vocabulário
+    compartilhado): construído uma vez a partir do léxico e reutilizado em
+    todas as transcrições. A busca percorre o texto uma única vez (tempo
+    linear no número de palavras mais o de ocorrências), independentemente
+    do tamanho do léxico. Termos sobrepostos ou contidos em
+    outros ("condropatia" e "condropatia patelar") são contados separadamente.
+    """
+
+    def __init__(self, terms: Iterable[Sequence[Hashable]]):
+        self.terms: List[Tuple[Hashable, ...]] = []
+        self._goto: List[Dict[Hashable, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        seen = set()
+        for term in terms:
+            term = tuple(term)
+            if not term or term in seen:
+                continue
+            seen.add(term)
+            self._insert(term, len(self.terms))
+            self.terms.append(term)
+        self._build_links()
+
+    def _insert(self, term: Tuple[Hashable, ...], index: int) -> None:
+        state = 0
+        for word in term:
+            child = self._goto[state].get(word)
+            if child is None:
+                child = len(self._goto)
+                self._goto[state][word] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = child
+        self._output[state].append(index)
+
+    def _build_links(self) -> None:
+        """
+        Calcula os links de falha em largura e herda as saídas do estado de falha.
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+                queue.append(child)
+
+    def count(self, words: Sequence[Hashable]) -> Counter:
+        """
+        Conta as ocorrências de cada termo (pelo índice em self.terms) em uma sequência de palavras ou IDs.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        counts = Counter()
+        state = 0
+        for word in words:
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            if output[state]:
+                counts.update(output[state])
+        return counts
+
+
+def term_matches(ref_counts: Counter, hyp_counts: Counter) -> Dict[int, Tuple[int, int, int]]:
+    """
+    Para cada termo presente na referência ou na hipótese, retorna
+    (ocorrências na referência, ocorrências na hipótese, ocorrências reconhecidas),
+    em que as reconhecidas são o mínimo das duas contagens (interseção de multiconjuntos).
+    """
+    return {
+        term: (ref_counts[term], hyp_counts[term], min(ref_counts[term], hyp_counts[term]))
+        for term in ref_counts.keys() | hyp_counts.keys()
+    }
@@ -0,0 +1,143 @@
+# Índice (manifest) do dataset compartilhado entre wer_test.py e info.py
+
+import os
+import json
+from typing import Dict, List, Optional, Sequence
+
+DATASET_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Datasets_Audios_Medicos
+DEFAULT_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset_manifest.json")
+
+METADATA_FOLDER = 'Transcriptions/json'
+MANUAL_FOLDER = 'Transcriptions/manual_transcriptions'
+AI_ROOT_FOLDER = 'Transcriptions/ai_transcriptions'
+
+MANIFEST_VERSION = 1
+METADATA_FIELDS = ('duracao', 'categoria', 'fonte', 'qt_vozes')
+
+
+def _scan_folder(dataset_root: str, folder: str) -> List[os.DirEntry]:
+    """
+    Lista os arquivos de uma pasta com os.scandir, em ordem de nome.
+    """
+    path = os.path.join(dataset_root, folder)
+    if not os.path.isdir(path):
+        return []
+    with os.scandir(path) as entries:
+        return sorted((entry for entry in entries if entry.is_file()), key=lambda entry: entry.name)
+
+
+def _ai_folders(dataset_root: str) -> List[str]:
+    """
+    Retorna as pastas de transcrições de IA (uma por motor).
+    """
+    path = os.path.join(dataset_root, AI_ROOT_FOLDER)
+    if not os.path.isdir(path):
+        return []
+    with os.scandir(path) as entries:
+        return sorted(f"{AI_ROOT_FOLDER}/{entry.name}" for entry in entries if entry.is_dir())
+
+
+def _previous_files(previous: Dict) -> Dict[str, Dict]:
+    """
+    Indexa os registros de arquivo do manifest anterior pelo caminho relativo.
+    """
+    records = {}
+    for audio in previous.get('audios', {}).values():
+        for record in audio.get('files', {}).values():
+            records[record['path']] = {**record, **{field: audio.get(field) for field in METADATA_FIELDS}}
+    return records
+
+
+def build_manifest(dataset_root: str = DATASET_ROOT, index_path: Optional[str] = DEFAULT_MANIFEST_PATH,
+                   metadata_folder: str = METADATA_FOLDER, extra_folders: Sequence[str] = (),
+                   word_count_folders: Sequence[str] = (MANUAL_FOLDER,)) -> Dict[str, Dict]:
+    """
+    Percorre uma única vez a pasta de metadados, as transcrições manuais e todas
+    as pastas ai_transcriptions/* e retorna o manifest indexado pelo ID do áudio
+    (prefixo antes do primeiro '_'). Pastas de transcrição fora de
+    ai_transcriptions podem ser incluídas via extra_folders.
+
+    O índice salvo em index_path é atualizado de forma incremental: arquivos com
+    o mesmo mtime reaproveitam os metadados e a contagem de palavras já
+    extraídos, então um início "quente" não abre nenhum JSON de metadados.
+    A contagem de palavras (word_count) só é feita nas pastas de
+    word_count_folders (as transcrições manuais); as demais são apenas listadas.
+    Se dois arquivos da mesma pasta têm o mesmo ID, vale o primeiro em ordem de
+    nome e um aviso é impresso.
+    """
+    previous = {}
+    if index_path and os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous.get('version') != MANIFEST_VERSION:
+            previous = {}
+    previous_files = _previous_files(previous)
+
+    audios: Dict[str, Dict] = {}
+    changed = previous.get('metadata_folder') != metadata_folder
+
+    folders = [metadata_folder, MANUAL_FOLDER] + _ai_folders(dataset_root)
+    folders += [folder for folder in extra_folders if folder not in folders]
+
+    for folder in folders:
+        for entry in _scan_folder(dataset_root, folder):
+            if folder == metadata_folder and not entry.name.endswith('.json'):
+                continue
+
+            audio_id = entry.name.split('_')[0]
+            audio = audios.setdefault(audio_id, {'files': {}})
+            if folder in audio['files']:
+                print(f"⚠️ ID {audio_id} repetido em {folder}: usando {audio['files'][folder]['path']}, "
+                      f"ignorando {entry.name}")
+                continue  # mantém o primeiro arquivo encontrado para o prefixo
+
+            relative_path = f"{folder}/{entry.name}"
+            mtime = entry.stat().st_mtime
+            record = {'path': relative_path, 'mtime': mtime}
+            cached = previous_files.get(relative_path)
+            fresh = cached is not None and cached['mtime'] == mtime
+            changed = changed or not fresh
+
+            if folder == metadata_folder:
+                if fresh:
+                    metadata = cached
+                else:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                for field in METADATA_FIELDS:
+                    audio[field] = metadata.get(field)
+            elif folder in word_count_folders:
+                if fresh and 'word_count' in cached:
+                    record['word_count'] = cached['word_count']
+                else:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        record['word_count'] = len(f.read().split())
+
+            audio['files'][folder] = record
+
+    manifest = {'version': MANIFEST_VERSION, 'metadata_folder': metadata_folder, 'audios': audios}
+    changed = changed or len(previous_files) != sum(len(audio['files']) for audio in audios.values())
+
+    if index_path and changed:
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
+
+    return audios
+
+
+def folder_files(audios: Dict[str, Dict], folder: str, dataset_root: str = DATASET_ROOT) -> Dict[str, str]:
+    """
+    Retorna {ID do áudio: caminho absoluto} dos arquivos de uma pasta do manifest.
+    """
+    return {
+        audio_id: os.path.join(dataset_root, audio['files'][folder]['path'])
+        for audio_id, audio in audios.items()
+        if folder in audio['files']
+    }
+
+
+if __name__ == "__main__":
+    audios = build_manifest()
+    print(f"Manifest com {len(audios)} áudios salvo em: {DEFAULT_MANIFEST_PATH}")
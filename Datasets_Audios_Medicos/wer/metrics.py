@@ -0,0 +1,200 @@
+# Métricas por par (WER, MER, WIL, CER e contagens) a partir de uma única passagem
+
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+from alignment import Operation, align_words
+from confusion import count_confusions
+from edit_distance import build_peq, edit_distance
+from vocabulary import Vocabulary
+
+METRIC_FIELDS = ('hits', 'substitutions', 'deletions', 'insertions',
+                 'ref_words', 'hyp_words', 'wer', 'mer', 'wil', 'cer')
+
+# Acertos seguidos que separam os trechos do limite superior do CER (ver _anchored_distance)
+ANCHOR_WORDS = 4
+
+
+def count_operations(ref_ids: Sequence[int], hyp_ids: Sequence[int],
+                     confusions: Optional[Counter] = None,
+                     ops: Optional[Sequence[Operation]] = None) -> Dict[str, int]:
+    """
+    Conta acertos, substituições, deleções e inserções de um único alinhamento
+    (ops, se já calculado; senão alinha o par).
+    Com confusions, também acumula nele os eventos de erro (confusion.count_confusions).
+    """
+    counts = {'equal': 0, 'substitute': 0, 'delete': 0, 'insert': 0}
+    if ops is None:
+        ops = align_words(ref_ids, hyp_ids)
+    for op, _, _ in ops:
+        counts[op] += 1
+    if confusions is not None:
+        count_confusions(ops, ref_ids, hyp_ids, confusions)
+    return {
+        'hits': counts['equal'],
+        'substitutions': counts['substitute'],
+        'deletions': counts['delete'],
+        'insertions': counts['insert'],
+    }
+
+
+def word_measures(hits: int, substitutions: int, deletions: int, insertions: int,
+                  ref_words: int, hyp_words: int) -> Dict[str, float]:
+    """
+    Calcula WER, MER e WIL a partir das contagens, com as mesmas convenções do jiwer.
+    """
+    errors = substitutions + deletions + insertions
+    if ref_words == 0:
+        wer = float(insertions)
+        mer, wip = (0.0, 1.0) if hyp_words == 0 else (1.0, 0.0)
+    else:
+        wer = errors / (hits + substitutions + deletions)
+        mer = errors / (hits + errors)
+        wip = (hits / ref_words) * (hits / hyp_words) if hyp_words else 0.0
+    return {'wer': wer, 'mer': mer, 'wil': 1 - wip}
+
+
+def _char_text(tokens: Sequence[int], vocabulary: Vocabulary) -> str:
+    """
+    Texto normalizado (palavras separadas por um espaço), sobre o qual o CER é calculado.
+    """
+    return ' '.join(vocabulary.decode(tokens))
+
+
+def _anchored_distance(ops: Sequence[Operation], ref_ids: Sequence[int], hyp_ids: Sequence[int],
+                       vocabulary: Vocabulary) -> int:
+    """
+    Limite superior da distância de caracteres, calculado trecho a trecho:
+    sequências de ANCHOR_WORDS ou mais acertos do alinhamento de palavras
+    ficam fixas e a distância só é calculada nos trechos entre elas (cada
+    palavra precedida de um espaço). É um alinhamento de caracteres válido,
+    então nunca é menor que a distância exata.
+    """
+    distance = 0
+    ref_chunk: List[int] = []
+    hyp_chunk: List[int] = []
+    hits: List[Operation] = []  # acertos seguidos ainda curtos demais para servir de âncora
+    run = 0
+    for op, i, j in (*ops, ('end', None, None)):
+        if op == 'equal':
+            run += 1
+            if run < ANCHOR_WORDS:
+                hits.append((op, i, j))
+            elif run == ANCHOR_WORDS:
+                if ref_chunk or hyp_chunk:
+                    distance += _chunk_distance(ref_chunk, hyp_chunk, vocabulary)
+                ref_chunk, hyp_chunk, hits = [], [], []
+            continue
+        for _, hit_i, hit_j in hits:
+            ref_chunk.append(ref_ids[hit_i])
+            hyp_chunk.append(hyp_ids[hit_j])
+        hits, run = [], 0
+        if i is not None:
+            ref_chunk.append(ref_ids[i])
+        if j is not None:
+            hyp_chunk.append(hyp_ids[j])
+    if ref_chunk or hyp_chunk:
+        distance += _chunk_distance(ref_chunk, hyp_chunk, vocabulary)
+    return distance
+
+
+def _chunk_distance(ref_chunk: Sequence[int], hyp_chunk: Sequence[int], vocabulary: Vocabulary) -> int:
+    """
+    Distância de caracteres de um trecho, com cada palavra precedida de um espaço.
+    """
+    ref_text = ''.join(' ' + word for word in vocabulary.decode(ref_chunk))
+    hyp_text = ''.join(' ' + word for word in vocabulary.decode(hyp_chunk))
+    return edit_distance(ref_text, hyp_text)
+
+
+def char_distance(ops: Sequence[Operation], ref_ids: Sequence[int], hyp_ids: Sequence[int],
+                  vocabulary: Vocabulary, ref_text: Optional[str] = None) -> int:
+    """
+    Distância de edição exata entre os caracteres dos dois textos normalizados.
+    O limite superior por trechos (_anchored_distance) entra como score_cutoff
+    do rapidfuzz, que só percorre a faixa da matriz compatível com ele: o
+    custo acompanha o dos erros, mas o resultado é sempre a distância exata,
+    mesmo quando o alinhamento ótimo de caracteres cruza as âncoras.
+    ref_text evita refazer o texto da referência a cada hipótese.
+    """
+    ref_text = _char_text(ref_ids, vocabulary) if ref_text is None else ref_text
+    hyp_text = _char_text(hyp_ids, vocabulary)
+    if not ref_ids or not hyp_ids:
+        return len(ref_text) + len(hyp_text)
+    return edit_distance(ref_text, hyp_text, _anchored_distance(ops, ref_ids, hyp_ids, vocabulary))
+
+
+def batch_metrics_ids(ref_ids: Sequence[int], hypotheses_ids: Sequence[Sequence[int]],
+                      vocabulary: Vocabulary, confusions: Optional[List[Counter]] = None) -> List[Dict[str, float]]:
+    """
+    Calcula o registro completo de métricas de várias hipóteses contra a mesma
+    referência, todas já convertidas em IDs do mesmo vocabulário. Cada par é
+    alinhado uma única vez (alignment.align_words, com o custo de uma passagem
+    do motor bit-paralelo): as contagens de palavras saem do alinhamento e o
+    CER exato usa a faixa delimitada por esse alinhamento (char_distance).
+    Com confusions (lista), acrescenta a ela um Counter de eventos de erro por
+    hipótese, reaproveitando o mesmo alinhamento.
+    """
+    ref_text = _char_text(ref_ids, vocabulary)
+    peq = build_peq(ref_ids)
+
+    results = []
+    for hyp_ids in hypotheses_ids:
+        ops = align_words(ref_ids, hyp_ids, peq)
+        pair_confusions = Counter() if confusions is not None else None
+        record = count_operations(ref_ids, hyp_ids, pair_confusions, ops)
+        if confusions is not None:
+            confusions.append(pair_confusions)
+        record['ref_words'] = len(ref_ids)
+        record['hyp_words'] = len(hyp_ids)
+        record.update(word_measures(**record))
+        record['cer'] = char_distance(ops, ref_ids, hyp_ids, vocabulary, ref_text) / max(len(ref_text), 1)
+        results.append(record)
+    return results
+
+
+def batch_metrics(reference: str, hypotheses: Sequence[str],
+                  vocabulary: Optional[Vocabulary] = None) -> List[Dict[str, float]]:
+    """
+    Igual a batch_metrics_ids, a partir de textos normalizados.
+    """
+    vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+    ref_ids = vocabulary.encode(reference.split())
+    return batch_metrics_ids(ref_ids, [vocabulary.encode(hypothesis.split()) for hypothesis in hypotheses],
+                             vocabulary)
+
+
+def pair_metrics(reference: str, hypothesis: str) -> Dict[str, float]:
+    """
+    Registro de métricas de um único par referência/hipótese.
+    """
+    return batch_metrics(reference, [hypothesis])[0]
+
+
+if __name__ == "__main__":
+    # Custo do registro completo de métricas comparado ao do WER sozinho
+    # (mesmo par sintético longo do benchmark de edit_distance.py)
+    import random
+    import time
+
+    from edit_distance import batch_word_error_rate
+
+    random.seed(0)
+    words = [f"palavra{i}" for i in range(2000)]
+    for size in (1000, 4000, 12000):
+        reference = [random.choice(words) for _ in range(size)]
+        hypothesis = [w if random.random() > 0.15 else random.choice(words) for w in reference]
+        hypothesis = [w for w in hypothesis if random.random() > 0.05]
+        ref_text, hyp_text = " ".join(reference), " ".join(hypothesis)
+
+        start = time.perf_counter()
+        wer = batch_word_error_rate(ref_text, [hyp_text])[0]
+        wer_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        record = batch_metrics(ref_text, [hyp_text])[0]
+        metrics_time = time.perf_counter() - start
+
+        assert abs(record['wer'] - wer) < 1e-12
+        print(f"{size:>6} palavras: WER {wer_time * 1000:7.1f} ms, métricas completas "
+              f"{metrics_time * 1000:7.1f} ms ({metrics_time / wer_time:.1f}x)")
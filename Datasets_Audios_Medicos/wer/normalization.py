@@ -0,0 +1,384 @@
+# Normalização configurável para português do Brasil (números, abreviações, unidades e acentos)
+
+import re
+import json
+import zlib
+import unicodedata
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from timestamps import MARKER_PATTERN
+
+# Abreviações expandidas em qualquer posição (com ou sem ponto final)
+ABBREVIATIONS: Dict[str, str] = {
+    'dr': 'doutor',
+    'dra': 'doutora',
+    'drs': 'doutores',
+    'dras': 'doutoras',
+    'sr': 'senhor',
+    'sra': 'senhora',
+    'srs': 'senhores',
+    'sras': 'senhoras',
+    'srta': 'senhorita',
+    'prof': 'professor',
+    'profa': 'professora',
+    'rx': 'raio x',
+    # Indicador ordinal/grau depois do "n" ("nº 5" -> "número cinco")
+    'nº': 'número',
+    'n°': 'número',
+    'nºs': 'números',
+    'n°s': 'números',
+}
+
+# Unidades expandidas somente logo após um número: (singular, plural, feminino)
+Unit = Tuple[str, str, bool]
+UNITS: Dict[str, Unit] = {
+    '%': ('por cento', 'por cento', False),
+    'mg': ('miligrama', 'miligramas', False),
+    'mcg': ('micrograma', 'microgramas', False),
+    'g': ('grama', 'gramas', False),
+    'kg': ('quilo', 'quilos', False),
+    'ml': ('mililitro', 'mililitros', False),
+    'l': ('litro', 'litros', False),
+    'mm': ('milímetro', 'milímetros', False),
+    'cm': ('centímetro', 'centímetros', False),
+    'm': ('metro', 'metros', False),
+    'km': ('quilômetro', 'quilômetros', False),
+    'mmhg': ('milímetro de mercúrio', 'milímetros de mercúrio', False),
+    'bpm': ('batimento por minuto', 'batimentos por minuto', False),
+    'ui': ('unidade internacional', 'unidades internacionais', True),
+    'h': ('hora', 'horas', True),
+    'min': ('minuto', 'minutos', False),
+    'x': ('vez', 'vezes', True),
+    '°c': ('grau celsius', 'graus celsius', False),
+    'ºc': ('grau celsius', 'graus celsius', False),
+}
+
+# Moedas expandidas antes do valor ("R$ 1,50" -> "um real e cinquenta centavos"): (singular, plural)
+CURRENCIES: Dict[str, Tuple[str, str]] = {
+    'r$': ('real', 'reais'),
+    'us$': ('dólar', 'dólares'),
+    '€': ('euro', 'euros'),
+}
+
+# Substantivos femininos comuns logo após um número, para a concordância
+# ("2 semanas" -> "duas semanas"). Os demais ficam no masculino: a lista não
+# cobre todo o vocabulário, só o que aparece com frequência em consultas.
+FEMININE_NOUNS = frozenset({
+    'semana', 'semanas', 'hora', 'horas', 'vez', 'vezes', 'dose', 'doses', 'gota', 'gotas',
+    'cápsula', 'cápsulas', 'ampola', 'ampolas', 'drágea', 'drágeas', 'pílula', 'pílulas',
+    'colher', 'colheres', 'medida', 'medidas', 'unidade', 'unidades', 'aplicação', 'aplicações',
+    'sessão', 'sessões', 'consulta', 'consultas', 'cirurgia', 'cirurgias', 'internação', 'internações',
+    'crise', 'crises', 'pessoa', 'pessoas', 'criança', 'crianças', 'mulher', 'mulheres',
+    'filha', 'filhas', 'gestação', 'gestações', 'noite', 'noites', 'manhã', 'manhãs',
+    'tarde', 'tardes', 'refeição', 'refeições', 'vacina', 'vacinas', 'injeção', 'injeções',
+    'camada', 'camadas', 'lesão', 'lesões', 'costela', 'costelas', 'vértebra', 'vértebras',
+})
+
+_UNITS_WORDS = ['zero', 'um', 'dois', 'três', 'quatro', 'cinco', 'seis', 'sete', 'oito', 'nove', 'dez',
+                'onze', 'doze', 'treze', 'quatorze', 'quinze', 'dezesseis', 'dezessete', 'dezoito', 'dezenove']
+_TENS_WORDS = ['', '', 'vinte', 'trinta', 'quarenta', 'cinquenta', 'sessenta', 'setenta', 'oitenta', 'noventa']
+_HUNDREDS_WORDS = ['', 'cento', 'duzentos', 'trezentos', 'quatrocentos', 'quinhentos', 'seiscentos',
+                   'setecentos', 'oitocentos', 'novecentos']
+_SCALES = [None, ('mil', 'mil'), ('milhão', 'milhões'), ('bilhão', 'bilhões'), ('trilhão', 'trilhões')]
+
+_ORDINAL_UNITS = ['', 'primeiro', 'segundo', 'terceiro', 'quarto', 'quinto', 'sexto', 'sétimo', 'oitavo', 'nono']
+_ORDINAL_TENS = ['', 'décimo', 'vigésimo', 'trigésimo', 'quadragésimo', 'quinquagésimo', 'sexagésimo',
+                 'septuagésimo', 'octogésimo', 'nonagésimo']
+_ORDINAL_HUNDREDS = ['', 'centésimo', 'ducentésimo', 'trecentésimo', 'quadringentésimo', 'quingentésimo',
+                     'sexcentésimo', 'septingentésimo', 'octingentésimo', 'nongentésimo']
+
+# Números mais longos que isso (telefones, documentos) são lidos dígito a dígito
+MAX_NUMBER_DIGITS = 15
+
+# 1.000 / 1.000,5 / 2,5 / 2.5 (ponto seguido de 3 dígitos é separador de milhar)
+_NUMBER = r'\d+(?:\.\d{3}(?!\d))*(?:[.,]\d+)?'
+_NUMBER_PARTS = re.compile(r'(\d+(?:\.\d{3})*)(?:[.,](\d+))?')
+
+# Não precedido/seguido por letra (dígitos são permitidos: "500mg", "10h30")
+_NOT_AFTER_LETTER = r'(?<![^\W\d_])'
+_NOT_BEFORE_LETTER = r'(?![^\W\d_])'
+
+_PUNCTUATION = re.compile(r'[^\w\s]+')
+
+# Palavra logo depois de um número (para a concordância com FEMININE_NOUNS)
+_NEXT_WORD = re.compile(r'\s+([^\W\d_]+)')
+
+
+def _feminine(words: str) -> str:
+    """
+    Flexiona no feminino as palavras de um número cardinal (um, dois, centenas).
+    """
+    return ' '.join(
+        'uma' if word == 'um' else 'duas' if word == 'dois' else
+        word[:-2] + 'as' if word.endswith('entos') else word
+        for word in words.split()
+    )
+
+
+def _below_thousand(n: int) -> str:
+    if n == 100:
+        return 'cem'
+    hundreds, rest = divmod(n, 100)
+    parts = [_HUNDREDS_WORDS[hundreds]] if hundreds else []
+    if rest >= 20:
+        tens, units = divmod(rest, 10)
+        parts.append(_TENS_WORDS[tens] + (' e ' + _UNITS_WORDS[units] if units else ''))
+    elif rest:
+        parts.append(_UNITS_WORDS[rest])
+    return ' e '.join(parts)
+
+
+def number_to_words(n: int, feminine: bool = False) -> str:
+    """
+    Escreve um inteiro não negativo por extenso (cardinal), em português do Brasil.
+    Ex.: 1250 -> 'mil duzentos e cinquenta'; 2 (feminino) -> 'duas'.
+    """
+    if n < 1000:
+        words = _UNITS_WORDS[n] if n < 20 else _below_thousand(n)
+        return _feminine(words) if feminine else words
+
+    groups = []
+    while n:
+        n, group = divmod(n, 1000)
+        groups.append(group)
+    if len(groups) > len(_SCALES):
+        raise ValueError("Número grande demais para ser escrito por extenso")
+
+    parts = []
+    nonzero = [scale for scale, group in enumerate(groups) if group]
+    for scale in reversed(nonzero):
+        group = groups[scale]
+        # Unidades e milhares concordam com o substantivo; milhões e acima são masculinos
+        words = _below_thousand(group) if group >= 20 else _UNITS_WORDS[group]
+        if feminine and scale < 2:
+            words = _feminine(words)
+        if scale == 1:
+            words = 'mil' if group == 1 else f'{words} mil'
+        elif scale >= 2:
+            singular, plural = _SCALES[scale]
+            words = f'{words} {singular if group == 1 else plural}'
+        if parts and scale == nonzero[0] and (group < 100 or group % 100 == 0):
+            parts.append('e')
+        parts.append(words)
+    return ' '.join(parts)
+
+
+def ordinal_to_words(n: int, feminine: bool = False) -> str:
+    """
+    Escreve um ordinal por extenso (1º -> 'primeiro', 2ª -> 'segunda').
+    Acima de 999 usa o cardinal.
+    """
+    if n == 0 or n >= 1000:
+        return number_to_words(n, feminine)
+    hundreds, rest = divmod(n, 100)
+    tens, units = divmod(rest, 10)
+    words = [_ORDINAL_HUNDREDS[hundreds], _ORDINAL_TENS[tens], _ORDINAL_UNITS[units]]
+    words = ' '.join(word for word in words if word)
+    if feminine:
+        words = ' '.join(word[:-1] + 'a' for word in words.split())
+    return words
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Compila uma lista de palavras em uma expressão regular no formato de trie
+    (prefixos comuns fatorados), que casa a mais longa possível primeiro.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return '(?:' + pattern + ')?'
+        return pattern
+
+    return build(trie)
+
+
+# Diacríticos combinantes (acentos, til, cedilha) após a decomposição NFD
+_COMBINING_MARKS = re.compile('[\u0300-\u036f]+')
+
+
+def fold_accents(text: str) -> str:
+    """
+    Remove acentos e cedilha ('ação' -> 'acao'), em C: decomposição NFD,
+    remoção das marcas combinantes e recomposição NFC.
+    """
+    return unicodedata.normalize('NFC', _COMBINING_MARKS.sub('', unicodedata.normalize('NFD', text)))
+
+
+class Normalizer:
+    """
+    Pipeline de normalização das transcrições, compilado uma única vez:
+    - converte para minúsculo;
+    - em uma única passagem de regex: remove marcações de tempo/chunk dos
+      provedores, escreve números por extenso (cardinais, decimais, ordinais
+      1º/2ª, unidades como "500mg" ou "38%" e valores como "R$ 1,50"),
+      expande abreviações (trie, incluindo "nº") e remove a pontuação;
+    - números concordam em gênero com a unidade, com o ordinal (ª) ou com o
+      substantivo seguinte, se ele estiver em FEMININE_NOUNS ("2 semanas" ->
+      "duas semanas"); fora dessa lista o número fica no masculino;
+    - opcionalmente remove acentos;
+    - remove espaços extras.
+
+    Com expand_numbers=False e sem abreviações/unidades, o resultado é o da
+    normalização básica (minúsculas, sem pontuação e espaços únicos).
+    """
+
+    def __init__(self, expand_numbers: bool = True, abbreviations: Optional[Mapping[str, str]] = None,
+                 units: Optional[Mapping[str, Unit]] = None, fold_accents: bool = False,
+                 currencies: Optional[Mapping[str, Tuple[str, str]]] = None,
+                 feminine_nouns: Optional[Iterable[str]] = None):
+        self.expand_numbers = expand_numbers
+        self.abbreviations = dict(ABBREVIATIONS if abbreviations is None else abbreviations)
+        self.units = dict(UNITS if units is None else units) if expand_numbers else {}
+        self.currencies = dict(CURRENCIES if currencies is None else currencies) if expand_numbers else {}
+        self.feminine_nouns = frozenset(FEMININE_NOUNS if feminine_nouns is None else feminine_nouns)
+        self.fold_accents = fold_accents
+
+        # Cada alternativa fica em um grupo externo, identificado por match.lastgroup
+        alternatives = [rf'(?P<marker>{MARKER_PATTERN.pattern})']
+        first_chars = ['*', '[']
+        if self.currencies:
+            alternatives.append(
+                rf'{_NOT_AFTER_LETTER}(?P<money>(?P<currency>{trie_pattern(self.currencies)})\s*(?P<amount>{_NUMBER})?)'
+            )
+            first_chars.extend(sorted({word[0] for word in self.currencies}))
+        if expand_numbers:
+            # A unidade é tentada antes do indicador ordinal/grau, para "38°c" virar graus celsius
+            unit = rf'\s*(?P<unit>{trie_pattern(self.units)}){_NOT_BEFORE_LETTER}' if self.units else r'(?!)'
+            alternatives.append(rf'(?P<numeral>(?P<number>{_NUMBER})(?:{unit}|(?P<ordinal>[ºª°]))?)')
+            first_chars.append(r'\d')
+        if self.abbreviations:
+            alternatives.append(
+                rf'{_NOT_AFTER_LETTER}(?P<abbreviation>{trie_pattern(self.abbreviations)}){_NOT_BEFORE_LETTER}\.?'
+            )
+            first_chars.extend(sorted({word[0] for word in self.abbreviations}))
+        # O lookahead com os primeiros caracteres possíveis descarta rapidamente
+        # as posições que não podem iniciar nenhuma regra (~3x mais rápido)
+        first_class = ''.join(char if char == r'\d' else re.escape(char) for char in first_chars)
+        self.pattern = re.compile(rf'(?=[{first_class}])(?:' + '|'.join(alternatives) + ')')
+
+    @property
+    def fingerprint(self) -> int:
+        """
+        Inteiro que identifica a configuração (muda se qualquer regra mudar);
+        entra na versão do cache de resultados.
+        """
+        config = [self.expand_numbers, self.abbreviations, self.units, self.fold_accents,
+                  self.currencies, sorted(self.feminine_nouns)]
+        return zlib.crc32(json.dumps(config, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+    def _replace(self, match: re.Match) -> str:
+        kind = match.lastgroup
+        if kind == 'numeral':
+            ordinal, unit = match.group('ordinal'), match.group('unit')
+            noun = _NEXT_WORD.match(match.string, match.end()) if ordinal is None and unit is None else None
+            feminine = noun is not None and noun.group(1) in self.feminine_nouns
+            return f" {self._number_words(match.group('number'), ordinal, unit, feminine)} "
+        if kind == 'money':
+            return f" {self._money_words(match.group('currency'), match.group('amount'))} "
+        if kind == 'abbreviation':
+            return f" {self.abbreviations[match.group('abbreviation')]} "
+        return ' '  # marcação de tempo/chunk/pausa
+
+    def _number_words(self, number: str, ordinal: Optional[str], unit: Optional[str],
+                      feminine_noun: bool = False) -> str:
+        feminine = feminine_noun or ordinal == 'ª' or (unit is not None and self.units[unit][2])
+        integer, decimal = _NUMBER_PARTS.fullmatch(number).groups()
+        digits = integer.replace('.', '')
+
+        if len(digits) > MAX_NUMBER_DIGITS:
+            words = ' '.join(_UNITS_WORDS[int(digit)] for digit in digits)
+        elif ordinal in ('º', 'ª') and decimal is None:
+            return ordinal_to_words(int(digits), feminine)
+        else:
+            words = number_to_words(int(digits), feminine)
+
+        value_is_one = int(digits) == 1 and decimal is None
+        if decimal is not None:
+            leading = len(decimal) - len(decimal.lstrip('0'))
+            rest = decimal.lstrip('0')
+            decimal_words = ['zero'] * leading + ([number_to_words(int(rest))] if rest else [])
+            words = f"{words} vírgula {' '.join(decimal_words)}"
+        if ordinal == '°':
+            words += ' graus'
+        elif unit is not None:
+            singular, plural, _ = self.units[unit]
+            words += ' ' + (singular if value_is_one else plural)
+        return words
+
+    def _money_words(self, currency: str, amount: Optional[str]) -> str:
+        """
+        Valor monetário por extenso: "R$ 1,50" -> "um real e cinquenta centavos",
+        "R$ 2.000.000" -> "dois milhões de reais"; o símbolo sozinho vira o plural.
+        """
+        singular, plural = self.currencies[currency]
+        if amount is None:
+            return plural
+        integer, decimal = _NUMBER_PARTS.fullmatch(amount).groups()
+        digits = integer.replace('.', '')
+        if len(digits) > MAX_NUMBER_DIGITS or (decimal is not None and len(decimal) > 2):
+            return f"{self._number_words(amount, None, None)} {plural}"
+
+        value = int(digits)
+        cents = int(decimal.ljust(2, '0')) if decimal is not None else 0
+        parts = []
+        if value or not cents:
+            name = singular if value == 1 else plural
+            if value >= 1_000_000 and value % 1_000_000 == 0:
+                name = f'de {name}'
+            parts.append(f"{number_to_words(value)} {name}")
+        if cents:
+            parts.append(f"{number_to_words(cents)} {'centavo' if cents == 1 else 'centavos'}")
+        return ' e '.join(parts)
+
+    def __call__(self, text: str) -> str:
+        text = self.pattern.sub(self._replace, text.lower())
+        text = _PUNCTUATION.sub('', text)
+        if self.fold_accents:
+            text = fold_accents(text)
+        return ' '.join(text.split())
+
+
+if __name__ == "__main__":
+    # Benchmark de vazão (MB/s) sobre todas as transcrições do dataset
+    import os
+    import time
+
+    dataset_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Transcriptions')
+    texts: List[str] = []
+    for root, _, files in os.walk(dataset_dir):
+        for name in files:
+            if name.endswith('.txt'):
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    texts.append(f.read())
+    size_mb = sum(len(text.encode('utf-8')) for text in texts) / 2 ** 20
+
+    def basic(text: str) -> str:
+        text = MARKER_PATTERN.sub(' ', text).lower()
+        return ' '.join(re.sub(r'[^\w\s]', '', text).split())
+
+    pipelines = [
+        ('básica (minúsculas e pontuação)', basic),
+        ('sem expansões', Normalizer(expand_numbers=False, abbreviations={})),
+        ('completa', Normalizer()),
+        ('completa + sem acentos', Normalizer(fold_accents=True)),
+    ]
+    repeats = 5
+    print(f"{len(texts)} transcrições, {size_mb:.2f} MB")
+    for name, normalize in pipelines:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for text in texts:
+                normalize(text)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<34} {size_mb * repeats / elapsed:8.1f} MB/s")
@@ -0,0 +1,151 @@
+# Histórico dos resultados (SQLite, somente inserção): uma linha por (execução, áudio, motor)
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+from typing import Mapping, Optional, Sequence
+
+import pandas as pd
+
+from metrics import METRIC_FIELDS
+
+DEFAULT_RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados_wer.sqlite")
+
+# Colunas numéricas de cada par, na ordem da tabela longa de aggregation.build_results_table
+RESULT_FIELDS = (*METRIC_FIELDS, 'errors', 'duration')
+_INTEGER_FIELDS = {'hits', 'substitutions', 'deletions', 'insertions', 'ref_words', 'hyp_words', 'errors'}
+
+
+def new_run_id() -> str:
+    """
+    Identificador de execução ordenável pela data: "20250101T120000-1a2b3c4d".
+    """
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class ResultsStore:
+    """
+    Armazena os resultados de cada execução sem sobrescrever as anteriores.
+    Cada par (áudio, motor) é gravado com o ID da execução, a versão do
+    modelo do motor e a versão da normalização, então é possível comparar o
+    WER entre execuções (e ao longo do tempo) com uma consulta, sem abrir
+    planilhas. Gravar uma execução custa apenas as linhas novas.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_RESULTS_PATH):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        metric_columns = ", ".join(f"{field} {'INTEGER' if field in _INTEGER_FIELDS else 'REAL'}"
+                                   for field in RESULT_FIELDS)
+        self.connection.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                norm_version INTEGER NOT NULL,
+                options TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pair_results (
+                run_id TEXT NOT NULL REFERENCES runs (run_id),
+                audio_id TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                model_version TEXT,
+                norm_version INTEGER NOT NULL,
+                {metric_columns},
+                PRIMARY KEY (run_id, audio_id, engine)
+            );
+            CREATE INDEX IF NOT EXISTS idx_pair_results_engine ON pair_results (engine, norm_version);
+            """
+        )
+        self.connection.commit()
+
+    def append_run(self, df: pd.DataFrame, norm_version: int, model_versions: Optional[Mapping[str, str]] = None,
+                   options: Optional[Mapping[str, object]] = None, run_id: Optional[str] = None) -> str:
+        """
+        Grava a tabela longa de uma execução (colunas "ID Áudio", "Modelo" e
+        RESULT_FIELDS) em uma única transação e retorna o ID da execução.
+        Execuções já gravadas nunca são alteradas.
+        """
+        run_id = run_id or new_run_id()
+        model_versions = model_versions or {}
+        values = df[list(RESULT_FIELDS)]
+        values = values.astype(object).where(values.notna(), None)  # NaN (ex.: duração ausente) vira NULL
+        rows = [
+            (run_id, audio_id, engine, model_versions.get(engine), norm_version, *fields)
+            for audio_id, engine, fields in zip(df["ID Áudio"], df["Modelo"], values.itertuples(index=False))
+        ]
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO runs (run_id, created_at, norm_version, options) VALUES (?, ?, ?, ?)",
+                (run_id, time.time(), norm_version, json.dumps(dict(options or {}), sort_keys=True)),
+            )
+            self.connection.executemany(
+                f"INSERT INTO pair_results (run_id, audio_id, engine, model_version, norm_version, "
+                f"{', '.join(RESULT_FIELDS)}) VALUES ({', '.join('?' * (5 + len(RESULT_FIELDS)))})",
+                rows,
+            )
+        return run_id
+
+    def latest_run_id(self) -> Optional[str]:
+        row = self.connection.execute("SELECT run_id FROM runs ORDER BY created_at DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def load_run(self, run_id: Optional[str] = None) -> pd.DataFrame:
+        """
+        Tabela longa de uma execução (a mais recente, se run_id for None), no
+        mesmo formato de aggregation.build_results_table e na ordem de gravação.
+        """
+        run_id = run_id or self.latest_run_id()
+        df = pd.read_sql_query(
+            f"SELECT audio_id AS \"ID Áudio\", engine AS \"Modelo\", {', '.join(RESULT_FIELDS)} "
+            "FROM pair_results WHERE run_id = ? ORDER BY rowid",
+            self.connection, params=(run_id,),
+        )
+        df["duration"] = df["duration"].astype(float)
+        return df
+
+    def run_history(self, engines: Sequence[str] = ()) -> pd.DataFrame:
+        """
+        WER do corpus e WER ponderado pela duração de cada motor em cada
+        execução, em ordem cronológica (agregados pelo próprio SQLite).
+        """
+        where = f"WHERE p.engine IN ({', '.join('?' * len(engines))})" if engines else ""
+        return pd.read_sql_query(
+            f"""
+            SELECT p.run_id, datetime(r.created_at, 'unixepoch', 'localtime') AS created_at,
+                   p.engine, p.model_version, p.norm_version, COUNT(*) AS files,
+                   SUM(p.errors) AS errors, SUM(p.ref_words) AS ref_words,
+                   CAST(SUM(p.errors) AS REAL) / NULLIF(SUM(p.ref_words), 0) AS corpus_wer,
+                   SUM(p.wer * p.duration) / NULLIF(SUM(p.duration), 0) AS weighted_wer
+            FROM pair_results p JOIN runs r ON r.run_id = p.run_id
+            {where}
+            GROUP BY p.run_id, p.engine
+            ORDER BY r.created_at, MIN(p.rowid)
+            """,
+            self.connection, params=tuple(engines),
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    # Evolução do WER de cada motor entre as execuções gravadas
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mostra o histórico de WER gravado pelas execuções de wer_test.py.")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH, help="Arquivo SQLite do histórico")
+    parser.add_argument("engines", nargs="*", help="Motores a mostrar (padrão: todos)")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.results)
+    history = store.run_history(args.engines)
+    store.close()
+    if history.empty:
+        print("Nenhuma execução gravada.")
+    else:
+        history[["corpus_wer", "weighted_wer"]] = (history[["corpus_wer", "weighted_wer"]] * 100).round(2)
+        with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 200):
+            print(history)
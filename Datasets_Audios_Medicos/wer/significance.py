@@ -0,0 +1,203 @@
+# Intervalos de confiança (bootstrap) e testes pareados entre motores, vetorizados com NumPy
+
+from itertools import combinations
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RESAMPLES = 10_000
+# Reamostragens processadas por bloco (limita a memória). Cada bloco faz um
+# único sorteio e um único bincount para todos os motores; blocos pequenos
+# mantêm o bincount no cache do processador. Com 3000 arquivos x 5 motores e
+# 10 mil reamostragens, o relatório completo leva ~0,4-0,5 s (~0,7-0,8 s com
+# blocos de 1000 e float64); o restante é quase todo sorteio e bincount
+BLOCK_SIZE = 50
+
+# Somas inteiras abaixo de 2**24 são exatas em float32: nesse caso as
+# reamostragens usam float32 (produto de matrizes mais rápido) sem mudar o resultado
+_FLOAT32_EXACT = 1 << 24
+
+
+def _exact_dtype(bound: float) -> type:
+    """
+    float32 quando toda soma parcial é no máximo bound (< 2**24), senão float64.
+    """
+    return np.float32 if bound < _FLOAT32_EXACT else np.float64
+
+
+def _bootstrap_weights(rng: np.random.Generator, n_files: int, n_resamples: int,
+                       dtype: type = np.float64) -> Iterator[np.ndarray]:
+    """
+    Gera, em blocos, as matrizes (reamostragens x arquivos) com quantas vezes
+    cada arquivo foi sorteado. Todos os sorteios de um bloco saem de uma só chamada.
+    """
+    for start in range(0, n_resamples, BLOCK_SIZE):
+        size = min(BLOCK_SIZE, n_resamples - start)
+        picks = rng.integers(0, n_files, (size, n_files), dtype=np.int32)
+        picks += (np.arange(size, dtype=np.int32) * n_files)[:, None]
+        counts = np.bincount(picks.ravel(), minlength=size * n_files)
+        yield counts.reshape(size, n_files).astype(dtype)
+
+
+def _sign_flips(rng: np.random.Generator, n_files: int, n_resamples: int,
+               dtype: type = np.float64) -> Iterator[np.ndarray]:
+    """
+    Gera, em blocos, matrizes de sinais +1/-1 (troca aleatória dos rótulos por arquivo).
+    """
+    for start in range(0, n_resamples, BLOCK_SIZE):
+        size = min(BLOCK_SIZE, n_resamples - start)
+        random_bytes = rng.integers(0, 256, (size, (n_files + 7) // 8), dtype=np.uint8)
+        bits = np.unpackbits(random_bytes, axis=1, count=n_files)
+        yield (1 - 2 * bits.astype(np.int8)).astype(dtype)
+
+
+def bootstrap_wer(errors: np.ndarray, ref_words: np.ndarray, n_resamples: int = DEFAULT_RESAMPLES,
+                  seed: int = 0) -> np.ndarray:
+    """
+    WER do corpus (total de erros / total de palavras) de cada motor em cada
+    reamostragem bootstrap de arquivos. Todos os motores usam os mesmos
+    sorteios, então as colunas do resultado são pareadas.
+
+    errors e ref_words: matrizes (arquivos x motores); use 0 nos dois para
+    arquivos sem transcrição daquele motor.
+    Retorna uma matriz (reamostragens x motores).
+    """
+    errors = np.asarray(errors, dtype=np.float64)
+    ref_words = np.asarray(ref_words, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    n_files, n_engines = errors.shape
+
+    # Erros e palavras em um só produto por bloco; cada soma é no máximo n_files x maior valor
+    data = np.hstack([errors, ref_words])
+    dtype = _exact_dtype(n_files * data.max(initial=0))
+    data = data.astype(dtype)
+
+    resampled = []
+    for weights in _bootstrap_weights(rng, n_files, n_resamples, dtype):
+        sums = (weights @ data).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            resampled.append(sums[:, :n_engines] / sums[:, n_engines:])
+    return np.vstack(resampled)
+
+
+def confidence_intervals(resampled: np.ndarray, confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Limites inferior e superior (percentis) de cada coluna das reamostragens.
+    """
+    alpha = (1 - confidence) / 2
+    low, high = np.nanquantile(resampled, [alpha, 1 - alpha], axis=0)
+    return low, high
+
+
+def bootstrap_p_values(resampled: np.ndarray, pairs: List[Tuple[int, int]]) -> np.ndarray:
+    """
+    P-valor bilateral do bootstrap pareado para cada par (a, b): proporção das
+    reamostragens em que a diferença de WER troca de sinal.
+    """
+    a_idx, b_idx = np.array(pairs, dtype=int).T
+    diff = resampled[:, a_idx] - resampled[:, b_idx]
+    below = np.mean(diff <= 0, axis=0)
+    above = np.mean(diff >= 0, axis=0)
+    return np.minimum(1.0, 2 * np.minimum(below, above))
+
+
+def permutation_p_values(errors: np.ndarray, ref_words: np.ndarray, pairs: List[Tuple[int, int]],
+                         n_resamples: int = DEFAULT_RESAMPLES, seed: int = 0) -> np.ndarray:
+    """
+    P-valor bilateral do teste de permutação pareado para cada par (a, b),
+    trocando aleatoriamente os rótulos a/b de cada arquivo.
+
+    errors: matriz (arquivos x motores) só com arquivos transcritos por todos
+    os motores; ref_words: palavras da referência de cada arquivo.
+    """
+    errors = np.asarray(errors, dtype=np.float64)
+    total_words = np.asarray(ref_words, dtype=np.float64).sum()
+    if not total_words:  # sem arquivos (ou só referências vazias): nada a testar
+        return np.full(len(pairs), np.nan)
+    a_idx, b_idx = np.array(pairs, dtype=int).T
+    differences = errors[:, a_idx] - errors[:, b_idx]  # (arquivos x pares)
+    observed = np.abs(differences.sum(axis=0) / total_words)
+
+    # Diferenças inteiras: cada soma com sinais é no máximo a soma dos valores absolutos
+    dtype = _exact_dtype(np.abs(differences).sum(axis=0).max(initial=0))
+    differences = differences.astype(dtype)
+
+    rng = np.random.default_rng(seed)
+    extreme = np.zeros(len(pairs))
+    for signs in _sign_flips(rng, errors.shape[0], n_resamples, dtype):
+        permuted = np.abs((signs @ differences).astype(np.float64) / total_words)
+        extreme += (permuted >= observed - 1e-12).sum(axis=0)
+    return (extreme + 1) / (n_resamples + 1)
+
+
+def significance_report(df: pd.DataFrame, n_resamples: int = DEFAULT_RESAMPLES, confidence: float = 0.95,
+                        seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    A partir da tabela longa de resultados (ver aggregation.build_results_table),
+    retorna (intervalos de confiança por motor, testes pareados entre motores).
+    Intervalos e testes usam o mesmo conjunto pareado: os arquivos transcritos
+    por todos os motores (coluna files). Sem nenhum arquivo em comum (ou só
+    com referências vazias), WER, intervalos e p-valores saem NaN.
+    """
+    errors = df.pivot(index="ID Áudio", columns="Modelo", values="errors")
+    ref_words = df.pivot(index="ID Áudio", columns="Modelo", values="ref_words")
+    labels = list(pd.unique(df["Modelo"]))
+    common = errors[labels].notna().all(axis=1).to_numpy()
+    errors_matrix = errors[labels].to_numpy(dtype=np.float64)[common]
+    words_matrix = ref_words[labels].to_numpy(dtype=np.float64)[common]
+    files = int(common.sum())
+
+    nan = np.full(len(labels), np.nan)
+    resampled = None
+    observed, low, high = nan, nan, nan
+    if files and words_matrix[:, 0].sum() > 0:
+        resampled = bootstrap_wer(errors_matrix, words_matrix, n_resamples, seed)
+        observed = errors_matrix.sum(axis=0) / words_matrix.sum(axis=0)
+        low, high = confidence_intervals(resampled, confidence)
+    intervals = pd.DataFrame({
+        "Modelo": labels,
+        "wer": observed,
+        "ci_low": low,
+        "ci_high": high,
+        "files": files,
+    })
+
+    columns = ["Modelo A", "Modelo B", "wer_diff", "p_bootstrap", "p_permutation", "files"]
+    pairs = list(combinations(range(len(labels)), 2))
+    if not pairs:
+        return intervals, pd.DataFrame(columns=columns)
+
+    if resampled is None:
+        p_boot = p_perm = np.full(len(pairs), np.nan)
+    else:
+        p_boot = bootstrap_p_values(resampled, pairs)
+        p_perm = permutation_p_values(errors_matrix, words_matrix[:, 0], pairs, n_resamples, seed)
+    tests = pd.DataFrame([
+        {"Modelo A": labels[a], "Modelo B": labels[b], "wer_diff": observed[a] - observed[b],
+         "p_bootstrap": p_boot[k], "p_permutation": p_perm[k], "files": files}
+        for k, (a, b) in enumerate(pairs)
+    ], columns=columns)
+    return intervals, tests
+
+
+if __name__ == "__main__":
+    # Tempo do relatório completo em um corpus sintético de 3000 arquivos x 5 motores
+    import time
+
+    rng = np.random.default_rng(1)
+    n_files, engines = 3000, ['AWS', 'Azure', 'GCP', 'Gemini', 'GPT4o']
+    words = rng.integers(50, 3000, n_files)
+    df = pd.concat([
+        pd.DataFrame({"ID Áudio": np.arange(n_files), "Modelo": engine,
+                      "errors": rng.binomial(words, 0.15 + 0.01 * k), "ref_words": words})
+        for k, engine in enumerate(engines)
+    ])
+
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        intervals, tests = significance_report(df)
+        best = min(best, time.perf_counter() - start)
+    print(intervals.round(4))
+    print(f"{n_files} arquivos x {len(engines)} motores x {DEFAULT_RESAMPLES} reamostragens: {best:.2f} s")
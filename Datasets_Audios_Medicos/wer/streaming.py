@@ -0,0 +1,170 @@
+# Tokenização em fluxo (buffers de tamanho fixo) para transcrições grandes, com memória limitada
+
+import re
+import hashlib
+from array import array
+from typing import Dict, FrozenSet, Iterator, Tuple
+
+from normalization import Normalizer
+from vocabulary import TOKEN_TYPECODE, Vocabulary
+
+DEFAULT_BUFFER_SIZE = 1 << 20  # caracteres lidos por vez
+
+# Espaço onde o texto pode ser cortado sem mudar a normalização: nenhuma regra
+# do Normalizer atravessa um espaço precedido por letra ou pontuação comum.
+# Não são seguros espaços depois de dígitos ("500 mg", "[00:01 - 00:02]"),
+# de abertura de marcação ("[ chunk 2]"), de hífen/travessão, de "chunk", de
+# reticências e de símbolos de moeda ("R$ 150", vindos de Normalizer.currencies).
+_SAFE_CUT_TEMPLATE = r'(?<=[^\s\d\[\-–…{currency}])(?<!\.\.\.)(?<!chunk)\s'
+
+# Expressões de corte já compiladas, pelos últimos caracteres das moedas do Normalizer
+_safe_cuts: Dict[FrozenSet[str], 're.Pattern[str]'] = {}
+
+# Janela (em caracteres, a partir do fim) onde o último corte seguro é procurado primeiro
+_CUT_WINDOW = 4096
+
+
+def _safe_cut_pattern(normalizer: Normalizer) -> 're.Pattern[str]':
+    """
+    Expressão dos espaços seguros para corte com as regras de moeda do normalizer.
+    """
+    endings = frozenset(currency[-1] for currency in normalizer.currencies)
+    if endings not in _safe_cuts:
+        currency = re.escape(''.join(sorted(endings)))
+        _safe_cuts[endings] = re.compile(_SAFE_CUT_TEMPLATE.format(currency=currency))
+    return _safe_cuts[endings]
+
+
+def _last_safe_cut(text: str, safe_cut: 're.Pattern[str]') -> int:
+    """
+    Posição do último espaço seguro para corte em text (-1 se não houver).
+    """
+    end = len(text)
+    while end > 0:
+        start = max(0, end - _CUT_WINDOW)
+        cut = -1
+        for match in safe_cut.finditer(text, start, end):
+            cut = match.start()
+        if cut >= 0:
+            return cut
+        end = start
+    return -1
+
+
+def iter_normalized_chunks(file_path: str, normalizer: Normalizer,
+                           buffer_size: int = DEFAULT_BUFFER_SIZE) -> Iterator[str]:
+    """
+    Lê o arquivo em buffers de buffer_size caracteres e devolve trechos já
+    normalizados, cortados apenas em espaços seguros. Marcações, números com
+    unidade e abreviações divididos entre dois buffers são recompostos.
+    O pico de memória depende do tamanho do buffer, não do arquivo
+    (salvo um trecho gigante sem nenhum espaço seguro, mantido inteiro).
+    """
+    safe_cut = _safe_cut_pattern(normalizer)
+    carry = ''
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        while True:
+            block = f.read(buffer_size)
+            if not block:
+                break
+            carry += block.lower()
+            cut = _last_safe_cut(carry, safe_cut)
+            if cut <= 0:
+                continue
+            yield normalizer(carry[:cut])
+            carry = carry[cut:]
+    if carry:
+        yield normalizer(carry)
+
+
+def iter_tokens(file_path: str, normalizer: Normalizer, buffer_size: int = DEFAULT_BUFFER_SIZE) -> Iterator[str]:
+    """
+    Gera as palavras normalizadas do arquivo uma a uma, na mesma sequência de
+    normalizer(conteúdo inteiro).split().
+    """
+    for chunk in iter_normalized_chunks(file_path, normalizer, buffer_size):
+        yield from chunk.split()
+
+
+def stream_transcript(file_path: str, vocabulary: Vocabulary, normalizer: Normalizer,
+                      buffer_size: int = DEFAULT_BUFFER_SIZE) -> Tuple[array, str]:
+    """
+    Tokeniza o arquivo em fluxo e retorna (array de IDs do vocabulário,
+    SHA-256 do texto normalizado). O hash é calculado incrementalmente e é
+    igual a wer_cache.content_hash(' '.join(palavras)), sem montar o texto.
+    """
+    ids = array(TOKEN_TYPECODE)
+    digest = hashlib.sha256()
+    separator = b''
+    for chunk in iter_normalized_chunks(file_path, normalizer, buffer_size):
+        words = chunk.split()
+        if not words:
+            continue
+        ids.extend(vocabulary.encode(words))
+        digest.update(separator + ' '.join(words).encode('utf-8'))
+        separator = b' '
+    return ids, digest.hexdigest()
+
+
+if __name__ == "__main__":
+    # Confere o fluxo contra o caminho em memória e mede o pico de memória
+    import os
+    import sys
+    import tempfile
+    import tracemalloc
+
+    from wer_cache import content_hash
+
+    normalizer = Normalizer()
+    dataset_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Transcriptions')
+    paths = [os.path.join(root, name) for root, _, files in os.walk(dataset_dir) for name in files
+             if name.endswith('.txt')]
+
+    for buffer_size in (7, 64, 1000):
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                expected = normalizer(f.read())
+            vocabulary = Vocabulary()
+            ids, digest = stream_transcript(path, vocabulary, normalizer, buffer_size)
+            if vocabulary.decode(ids) != expected.split() or digest != content_hash(expected):
+                sys.exit(f"Divergência em {path} (buffer {buffer_size})")
+    # Frases com regras que atravessam espaços (moedas, unidades, marcações), em todos os tamanhos de buffer
+    sentences = ['o exame custou R$ 150,00 e a consulta US$ 20 hoje, € 3,5 no total',
+                 'nº 5 com 500 mg e 21 semanas [00:01 - 00:02] febre de 38 °C, retorno às ( 10:30 )']
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for index, sentence in enumerate(sentences):
+            path = os.path.join(temp_dir, f'frase_{index}.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(sentence)
+            expected = normalizer(sentence)
+            for buffer_size in range(1, len(sentence) + 1):
+                vocabulary = Vocabulary()
+                ids, digest = stream_transcript(path, vocabulary, normalizer, buffer_size)
+                if vocabulary.decode(ids) != expected.split() or digest != content_hash(expected):
+                    sys.exit(f"Divergência em {sentence!r} (buffer {buffer_size})")
+    print(f"{len(paths)} arquivos e {len(sentences)} frases: fluxo idêntico ao caminho em memória")
+
+    # Arquivo sintético grande: pico do fluxo x leitura inteira
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as tmp:
+        with open(paths[0], 'r', encoding='utf-8') as f:
+            sample = f.read()
+        for _ in range(max(1, (10 << 20) // max(len(sample), 1))):
+            tmp.write(sample + '\n')
+    size_mb = os.path.getsize(tmp.name) / 2 ** 20
+
+    tracemalloc.start()
+    for _ in iter_tokens(tmp.name, normalizer):
+        pass
+    _, streaming_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    with open(tmp.name, 'r', encoding='utf-8') as f:
+        tokens = normalizer(f.read()).split()
+    _, in_memory_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tokens
+    os.remove(tmp.name)
+
+    print(f"arquivo de {size_mb:.0f} MB: pico em fluxo {streaming_peak / 2 ** 20:.1f} MB, "
+          f"em memória {in_memory_peak / 2 ** 20:.1f} MB")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import random
+
+# Adicionar o diretório atual ao path para importar o módulo
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import jiwer
+
+from edit_distance import batch_word_error_rate, word_error_rate
+from metrics import batch_metrics
+
+
+def random_pair(rng: random.Random, size: int, vocabulary_size: int):
+    """Referência aleatória e uma hipótese com substituições, deleções e inserções."""
+    words = [f"w{i}" for i in range(vocabulary_size)]
+    reference = [rng.choice(words) for _ in range(size)]
+    hypothesis = []
+    for word in reference:
+        roll = rng.random()
+        if roll < 0.1:
+            hypothesis.append(rng.choice(words))
+        elif roll < 0.15:
+            continue
+        else:
+            hypothesis.append(word)
+        if rng.random() < 0.05:
+            hypothesis.append(rng.choice(words))
+    return " ".join(reference), " ".join(hypothesis)
+
+
+def check_pair(reference: str, hypothesis: str) -> None:
+    """
+    Compara WER, total de erros e CER com os do jiwer (devem ser iguais).
+    """
+    expected = jiwer.wer(reference, hypothesis)
+    assert word_error_rate(reference, hypothesis) == expected, (reference, hypothesis)
+    assert batch_word_error_rate(reference, [hypothesis])[0] == expected, (reference, hypothesis)
+
+    record = batch_metrics(reference, [hypothesis])[0]
+    assert record['wer'] == expected, (reference, hypothesis)
+    if reference:
+        output = jiwer.process_words(reference, hypothesis)
+        errors = record['substitutions'] + record['deletions'] + record['insertions']
+        assert errors == output.substitutions + output.deletions + output.insertions, (reference, hypothesis)
+    expected_cer = jiwer.cer(reference, hypothesis) if reference else len(hypothesis)
+    assert abs(record['cer'] - expected_cer) < 1e-12, (reference, hypothesis, record['cer'], expected_cer)
+
+
+if __name__ == "__main__":
+    try:
+        rng = random.Random(0)
+        realistic = []  # vocabulário grande
+        degenerate = []  # poucas palavras quase iguais: o alinhamento de caracteres cruza as âncoras
+        cases = [
+            ("", ""),
+            ("", "uma hipótese sem referência"),
+            ("uma referência sem hipótese", ""),
+            ("a", "a"),
+            ("a", "b"),
+        ]
+        # Pares curtos (cabem em uma palavra de máquina) e longos (> 64 palavras, vários limbs)
+        for size in (1, 5, 63, 64, 65, 128, 500, 3000):
+            realistic.append(random_pair(rng, size, 1000))
+            degenerate.append(random_pair(rng, size, 3))
+        for _ in range(300):
+            realistic.append(random_pair(rng, rng.randint(1, 200), 1000))
+            degenerate.append(random_pair(rng, rng.randint(1, 200), rng.choice((2, 10))))
+
+        for reference, hypothesis in cases + realistic + degenerate:
+            check_pair(reference, hypothesis)
+        print(f"Script rodou com sucesso: {len(cases) + len(realistic) + len(degenerate)} pares com WER, "
+              f"erros e CER iguais ao jiwer ({len(degenerate)} deles com vocabulário mínimo)")
+    except Exception as e:
+        print(f"Erro ao executar o script: {e}")
+        import traceback
+        traceback.print_exc()
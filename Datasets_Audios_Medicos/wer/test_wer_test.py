@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import subprocess
+import tempfile
+
+import pandas as pd
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wer_test.py')
+
+
+def run_wer_test(temp_dir: str, excel: str, *options: str) -> bytes:
+    """Executa wer_test.py com cache e histórico temporários e retorna os bytes da planilha."""
+    path = os.path.join(temp_dir, excel)
+    subprocess.run([sys.executable, SCRIPT, '--cache', os.path.join(temp_dir, 'cache.sqlite'),
+                    '--results', os.path.join(temp_dir, 'resultados.sqlite'), '--excel', path,
+                    '--resamples', '200', *options],
+                   check=True, stdout=subprocess.DEVNULL)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+if __name__ == "__main__":
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Com as opções padrão (histórico gravado a cada execução), a planilha é idêntica byte a byte
+            first = run_wer_test(temp_dir, 'primeira.xlsx')
+            second = run_wer_test(temp_dir, 'segunda.xlsx')
+            parallel = run_wer_test(temp_dir, 'paralela.xlsx', '--workers', '2')
+            without_history = run_wer_test(temp_dir, 'sem_historico.xlsx', '--results', '')
+            assert first == second == parallel == without_history, "planilhas diferentes entre execuções"
+
+            # O histórico só entra na planilha com --history-sheet (as 4 execuções gravadas até aqui)
+            run_wer_test(temp_dir, 'historico.xlsx', '--history-sheet')
+            history = pd.read_excel(os.path.join(temp_dir, 'historico.xlsx'), sheet_name='Histórico')
+            assert history['run_id'].nunique() == 4, history['run_id'].nunique()
+            assert 'Histórico' not in pd.ExcelFile(os.path.join(temp_dir, 'primeira.xlsx')).sheet_names
+        print('Script rodou com sucesso: planilha idêntica em 4 execuções (com histórico, --workers 2 '
+              'e sem histórico); aba Histórico só com --history-sheet')
+    except Exception as e:
+        print(f"Erro ao executar o script: {e}")
+        import traceback
+        traceback.print_exc()
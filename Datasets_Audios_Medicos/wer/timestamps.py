@@ -0,0 +1,85 @@
+# Parser das marcações de tempo inseridas pelos provedores (Gemini, GPT, chunks)
+
+import re
+from typing import List, NamedTuple, Optional
+
+# Duração de cada chunk do RobustAudioTranscriber (application/gpt/robust_transcription.py)
+DEFAULT_CHUNK_SECONDS = 300
+
+_TIME = r'(?:\d{1,2}:)?\d{1,2}:\d{2}(?:[.,]\d{1,3})?'
+
+# Uma única expressão para todos os estilos de marcação:
+#   [hh:mm:ss] / [MM:SS] / [00:01:02.500]  (Gemini e GPT, com ou sem **negrito**)
+#   [00:00:03 - 00:00:07]                  (intervalos)
+#   [Chunk N]                              (RobustAudioTranscriber.transcribe_file)
+#   [...] / […]                            (pausas longas pedidas no prompt do GPT)
+# Só entre colchetes: horários entre parênteses fazem parte da fala ("retorno às (10:30)")
+MARKER_PATTERN = re.compile(
+    r'\*{0,2}\[\s*(?:'
+    r'chunk\s*(?P<chunk>\d+)'
+    rf'|(?P<start>{_TIME})(?:\s*[-–]\s*{_TIME})?'
+    r'|(?:\.\.\.|…)'
+    r')\s*\]\*{0,2}:?',
+    re.IGNORECASE,
+)
+
+
+class Segment(NamedTuple):
+    start: Optional[float]  # segundos desde o início do áudio (None antes da 1ª marcação)
+    text: str
+
+
+def parse_time(value: str) -> float:
+    """
+    Converte 'hh:mm:ss', 'mm:ss' ou com milissegundos ('mm:ss.mmm') em segundos.
+    """
+    seconds = 0.0
+    for part in value.replace(',', '.').split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_transcript(text: str, chunk_seconds: float = DEFAULT_CHUNK_SECONDS) -> List[Segment]:
+    """
+    Divide a transcrição em segmentos (início em segundos, texto) em uma única
+    passagem. Marcações [Chunk N] deslocam os tempos seguintes em
+    (N - 1) * chunk_seconds; pausas [...] são apenas removidas.
+    Segmentos sem texto não são retornados.
+    """
+    segments = []
+    offset = 0.0
+    start = None
+    parts = []  # pedaços de texto do segmento atual (separados por pausas)
+    position = 0
+
+    for match in MARKER_PATTERN.finditer(text):
+        parts.append(text[position:match.start()])
+        position = match.end()
+
+        chunk, timestamp = match.group('chunk'), match.group('start')
+        if chunk is None and timestamp is None:
+            continue  # pausa: o texto segue no mesmo segmento
+
+        content = ' '.join(' '.join(parts).split())
+        if content:
+            segments.append(Segment(start, content))
+        parts = []
+
+        if chunk is not None:
+            offset = (int(chunk) - 1) * float(chunk_seconds)
+            start = offset
+        else:
+            start = offset + parse_time(timestamp)
+
+    parts.append(text[position:])
+    content = ' '.join(' '.join(parts).split())
+    if content:
+        segments.append(Segment(start, content))
+    return segments
+
+
+def strip_markers(text: str) -> str:
+    """
+    Remove todas as marcações de tempo, chunk e pausa, deixando só o texto falado.
+    """
+    return MARKER_PATTERN.sub(' ', text)
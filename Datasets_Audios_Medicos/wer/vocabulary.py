@@ -0,0 +1,88 @@
+# Vocabulário compartilhado: cada palavra vira um ID int32 e cada transcrição um array compacto
+
+from array import array
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+# Código de tipo do array com inteiros de 32 bits (int32)
+TOKEN_TYPECODE = 'i'
+
+
+class Vocabulary:
+    """
+    Interna palavras em IDs inteiros sequenciais (0, 1, 2, ...).
+    Uma transcrição vira um array('i') com 4 bytes por palavra, em vez de uma
+    lista de objetos str; comparar tokens passa a ser comparar inteiros.
+    Os IDs valem apenas dentro do mesmo vocabulário (e do mesmo processo).
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.words: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def intern(self, word: str) -> int:
+        """
+        Retorna o ID da palavra, criando-o se ainda não existir.
+        """
+        token = self._ids.get(word)
+        if token is None:
+            token = self._ids[word] = len(self.words)
+            self.words.append(word)
+        return token
+
+    def encode(self, words: Iterable[str]) -> array:
+        """
+        Converte uma sequência de palavras em um array('i') de IDs, internando as novas.
+        """
+        ids = self._ids
+        tokens = array(TOKEN_TYPECODE)
+        for word in words:
+            token = ids.get(word)
+            if token is None:
+                token = ids[word] = len(self.words)
+                self.words.append(word)
+            tokens.append(token)
+        return tokens
+
+    def decode(self, tokens: Sequence[int]) -> List[str]:
+        """
+        Converte IDs de volta em palavras.
+        """
+        words = self.words
+        return [words[token] for token in tokens]
+
+
+def as_numpy(tokens: array) -> np.ndarray:
+    """
+    Visão NumPy (int32) de um array de IDs, sem cópia.
+    """
+    return np.frombuffer(tokens, dtype=np.int32)
+
+
+if __name__ == "__main__":
+    # Benchmark de memória: listas de str (como o split() do jiwer) x arrays de IDs
+    import random
+    import tracemalloc
+
+    random.seed(0)
+    lexicon = [f"palavra{i}" for i in range(20000)]
+    texts = [" ".join(random.choice(lexicon) for _ in range(5000)) for _ in range(200)]
+
+    tracemalloc.start()
+    as_lists = [text.split() for text in texts]
+    lists_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del as_lists
+
+    tracemalloc.start()
+    vocabulary = Vocabulary()
+    as_arrays = [vocabulary.encode(text.split()) for text in texts]
+    arrays_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"listas de str: {lists_bytes / 2 ** 20:7.1f} MB")
+    print(f"arrays de IDs: {arrays_bytes / 2 ** 20:7.1f} MB (incluindo {len(vocabulary)} palavras do vocabulário)")
@@ -0,0 +1,104 @@
+# Cache persistente (SQLite) dos resultados de WER por conteúdo das transcrições
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from typing import Dict, Iterable, List, Tuple
+
+CacheKey = Tuple[str, str]
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wer_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Campo opcional do registro com os eventos de erro do par, como listas
+# [palavra da referência, palavra da IA, ocorrências] (None no lado ausente)
+CONFUSIONS_FIELD = 'confusions'
+
+
+def content_hash(text: str) -> str:
+    """
+    Retorna o hash SHA-256 de um texto normalizado.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class WerCache:
+    """
+    Cache de resultados indexado por (hash da referência normalizada,
+    hash da hipótese normalizada, versão da normalização). O valor é o
+    registro de métricas do par (WER, MER, WIL, CER e contagens) e, se a
+    execução coletou confusões, os eventos de erro (CONFUSIONS_FIELD), para
+    que execuções seguintes não precisem alinhar o par de novo.
+    Quando passa de max_entries, remove as entradas usadas há mais tempo (LRU).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, normalization_version: int = 1,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.normalization_version = normalization_version
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pair_metrics (
+                ref_hash TEXT NOT NULL,
+                hyp_hash TEXT NOT NULL,
+                norm_version INTEGER NOT NULL,
+                metrics TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (ref_hash, hyp_hash, norm_version)
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_pair_metrics_last_used ON pair_metrics (last_used)")
+        self.connection.commit()
+
+    def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Dict[str, float]]:
+        """
+        Busca vários pares de uma vez e retorna apenas os encontrados.
+        """
+        found = {}
+        for ref_hash, hyp_hash in keys:
+            row = self.connection.execute(
+                "SELECT metrics FROM pair_metrics WHERE ref_hash = ? AND hyp_hash = ? AND norm_version = ?",
+                (ref_hash, hyp_hash, self.normalization_version),
+            ).fetchone()
+            if row is not None:
+                found[(ref_hash, hyp_hash)] = json.loads(row[0])
+        return found
+
+    def put_many(self, entries: Dict[CacheKey, Dict[str, float]], touched: List[CacheKey] = ()) -> None:
+        """
+        Grava novos resultados, atualiza o uso dos acertos e aplica o limite de tamanho.
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO pair_metrics (ref_hash, hyp_hash, norm_version, metrics, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(ref_hash, hyp_hash, self.normalization_version, json.dumps(value), now)
+                 for (ref_hash, hyp_hash), value in entries.items()],
+            )
+            self.connection.executemany(
+                "UPDATE pair_metrics SET last_used = ? WHERE ref_hash = ? AND hyp_hash = ? AND norm_version = ?",
+                [(now, ref_hash, hyp_hash, self.normalization_version) for ref_hash, hyp_hash in touched],
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Remove as entradas menos usadas recentemente acima de max_entries.
+        """
+        count = self.connection.execute("SELECT COUNT(*) FROM pair_metrics").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM pair_metrics WHERE rowid IN "
+                "(SELECT rowid FROM pair_metrics ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def close(self) -> None:
+        self.connection.close()
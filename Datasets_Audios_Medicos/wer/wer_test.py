@@ -1,115 +1,516 @@
 import os
 import re
 import json
-from typing import Dict, Union
-from jiwer import wer
+import zipfile
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 
+from alignment import align_words
+from confusion import ConfusionIndex, to_word_pairs
+from cpwer import cp_word_error_rate, split_speakers
+from edit_distance import batch_word_error_rate, encode_tokens, word_error_rate
+from incremental import IncrementalWER
+from lexicon import DEFAULT_LEXICON_PATH, TermMatcher, load_lexicon, term_matches
+from manifest import METADATA_FIELDS, build_manifest, folder_files
+from metrics import METRIC_FIELDS, batch_metrics_ids
+from normalization import Normalizer
+from results_store import DEFAULT_RESULTS_PATH, ResultsStore
+from aggregation import (GROUP_DIMENSIONS, build_results_table, engine_summary, format_percent, grouped_summary,
+                         term_summary, wer_by_audio)
+from significance import DEFAULT_RESAMPLES, significance_report
+from streaming import stream_transcript
+from timestamps import Segment, parse_transcript
+from vocabulary import Vocabulary
+from windows import has_timestamps, hypothesis_word_times, window_scores
+from wer_cache import CONFUSIONS_FIELD, DEFAULT_CACHE_PATH, WerCache
+
+# Incrementar sempre que normalize_transcript ou o cálculo das métricas gravadas
+# mudar (invalida o cache de resultados).
+# Opções do Normalizer (números, abreviações, acentos) entram na versão pelo fingerprint.
+NORMALIZATION_VERSION = 6
+
+# Normalização padrão: números por extenso, abreviações e unidades expandidas, acentos mantidos
+DEFAULT_NORMALIZER = Normalizer()
+
+# Vocabulário compartilhado: cada palavra normalizada vira um ID int32 (por processo)
+VOCABULARY = Vocabulary()
+
+# Conexões de cache abertas por processo (não podem ser herdadas via fork)
+_open_caches: Dict[Tuple[int, str, int], WerCache] = {}
+
+# Autômatos de termos já construídos, por (arquivo de léxico, normalização)
+_matchers: Dict[Tuple[str, int], TermMatcher] = {}
+
+# Configuração dos motores (application/model/models_api.json), de onde vem a versão do modelo
+MODELS_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                  "application", "model", "models_api.json")
+
+# Data fixa gravada no .xlsx (metadados e entradas do zip), para que execuções
+# com os mesmos dados gerem arquivos idênticos byte a byte (com ou sem --workers)
+EXCEL_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+_CORE_DATES = re.compile(r'(<dcterms:(?:created|modified)[^>]*>)[^<]*(</dcterms:)')
+
+
+def pin_excel_timestamps(path: str) -> None:
+    """
+    Regrava o .xlsx com EXCEL_TIMESTAMP no lugar da data de criação/modificação
+    (docProps/core.xml) e da data de cada entrada do zip, que o openpyxl
+    preenche com o horário do salvamento.
+    """
+    stamp = '{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z'.format(*EXCEL_TIMESTAMP)
+    with zipfile.ZipFile(path) as source:
+        entries = [(info.filename, source.read(info)) for info in source.infolist()]
+    with zipfile.ZipFile(path, 'w') as target:
+        for name, data in entries:
+            if name == 'docProps/core.xml':
+                data = _CORE_DATES.sub(rf'\g<1>{stamp}\g<2>', data.decode('utf-8')).encode('utf-8')
+            target.writestr(zipfile.ZipInfo(name, EXCEL_TIMESTAMP), data, compress_type=zipfile.ZIP_DEFLATED)
+
+def normalize_text(text: str, normalizer: Optional[Normalizer] = None) -> str:
+    """
+    Aplica as normalizações de normalize_transcript a um texto já carregado.
+    """
+    return (normalizer or DEFAULT_NORMALIZER)(text)
 
-def normalize_transcript(file_path: str) -> str:
+def normalize_transcript(file_path: str, normalizer: Optional[Normalizer] = None) -> str:
     """
-    Lê o arquivo de texto e faz algumas normalizações básicas:
+    Lê o arquivo de texto e aplica a normalização para português do Brasil
+    (normalization.Normalizer, compilada uma única vez):
+    - Remove marcações de tempo/chunk dos provedores ([00:01:02], [MM:SS], [Chunk N])
     - Converte para minúsculo
-    - Remove pontuação
+    - Escreve números por extenso ("60" -> "sessenta", "500mg" -> "quinhentos miligramas")
+    - Expande abreviações ("dr." -> "doutor")
+    - Remove pontuação (e, se configurado, acentos)
     - Remove espaços extras
     Retorna a string normalizada.
     """
     with open(file_path, 'r', encoding='utf-8') as f:
         text = f.read()
-    # Converte para minúsculo
-    text = text.lower()
-    # Remove pontuação (mantendo letras, dígitos e espaços)
-    text = re.sub(r'[^\w\s]', '', text)
-    # Remove espaços extras
-    text = ' '.join(text.split())
-    return text
+    return normalize_text(text, normalizer)
+
+def tokenize_transcript(file_path: str, normalizer: Optional[Normalizer] = None) -> array:
+    """
+    Lê e normaliza o arquivo em fluxo (buffers de tamanho fixo, com o mesmo
+    resultado de normalize_transcript) e retorna as palavras como um
+    array('i') de IDs do vocabulário compartilhado.
+    """
+    return stream_transcript(file_path, VOCABULARY, normalizer or DEFAULT_NORMALIZER)[0]
+
+def normalization_version(normalizer: Optional[Normalizer] = None) -> int:
+    """
+    Versão usada no cache de resultados: NORMALIZATION_VERSION combinada
+    com o fingerprint da configuração do Normalizer.
+    """
+    return (NORMALIZATION_VERSION << 32) | (normalizer or DEFAULT_NORMALIZER).fingerprint
+
 def wer_test(t_real: str, t_ai: str) -> float:
     """
     Retorna o valor de WER entre duas strings.
+    Usa o motor nativo bit-paralelo (mesmo resultado do jiwer.wer).
+    """
+    return word_error_rate(t_real, t_ai)
+
+def wer_alignment(t_real: str, t_ai: str) -> List[Tuple[str, Optional[str], Optional[str]]]:
     """
-    return wer(t_real, t_ai)
+    Retorna o alinhamento palavra a palavra entre duas strings normalizadas,
+    como uma lista de (operação, palavra da referência, palavra da IA).
+    Operações: 'equal', 'substitute', 'delete' e 'insert'.
+    Usa memória linear, mesmo para consultas longas.
+    """
+    ref_words, ai_words = t_real.split(), t_ai.split()
+    ref_ids, ai_ids = encode_tokens(ref_words, ai_words, VOCABULARY)
+    return [
+        (op, ref_words[i] if i is not None else None, ai_words[j] if j is not None else None)
+        for op, i, j in align_words(ref_ids, ai_ids)
+    ]
+
+def wer_batch(t_real: str, t_ai_list: List[str]) -> List[float]:
+    """
+    Retorna o WER de cada hipótese contra a mesma referência,
+    tokenizando a referência uma única vez.
+    """
+    return batch_word_error_rate(t_real, t_ai_list)
+
+def wer_incremental(t_real: str, normalizer: Optional[Normalizer] = None) -> IncrementalWER:
+    """
+    Retorna um pontuador incremental para a referência já normalizada: cada
+    trecho da IA (normalizado com normalizer) é acrescentado com .append(),
+    que devolve o WER atual sem recalcular a hipótese inteira.
+    """
+    return IncrementalWER(t_real, normalize=normalizer or DEFAULT_NORMALIZER)
+
+def _dataset_path(relative_path: str) -> str:
+    """
+    Resolve um caminho relativo à pasta Datasets_Audios_Medicos e verifica se existe.
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))  # pasta wer
+    parent_dir = os.path.dirname(current_dir)  # Datasets_Audios_Medicos
+    path = os.path.join(parent_dir, relative_path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Diretório não encontrado: {path}")
+    return path
+
+def _build_tasks(manual_transcription_folder_path: str,
+                 ai_transcription_folders: Dict[str, str]) -> List[Tuple[str, str, List[Tuple[str, str]]]]:
+    """
+    Monta, a partir do manifest, as unidades de trabalho (prefixo, referência,
+    [(label do motor, hipótese)]) em ordem estável (nome do arquivo manual).
+    """
+    _dataset_path(manual_transcription_folder_path)
+    for folder in ai_transcription_folders.values():
+        _dataset_path(folder)
+
+    # Índice prefixo -> arquivo de cada pasta, vindo do manifest do dataset
+    audios = build_manifest(extra_folders=[manual_transcription_folder_path, *ai_transcription_folders.values()])
+    manual_files = folder_files(audios, manual_transcription_folder_path)
+    ai_indexes = {label: folder_files(audios, folder) for label, folder in ai_transcription_folders.items()}
+
+    tasks = []
+    for manual_prefix, manual_file_path in sorted(manual_files.items(), key=lambda item: os.path.basename(item[1])):
+        ai_files = [(label, index[manual_prefix]) for label, index in ai_indexes.items() if manual_prefix in index]
+        if not ai_files:
+            continue  # pula se nenhum motor tiver correspondente
+
+        tasks.append((manual_prefix, manual_file_path, ai_files))
+    return tasks
+
+def _get_cache(cache_path: str, version: int) -> WerCache:
+    """
+    Retorna a conexão de cache deste processo para a versão de normalização,
+    abrindo-a na primeira chamada.
+    """
+    key = (os.getpid(), cache_path, version)
+    if key not in _open_caches:
+        _open_caches[key] = WerCache(cache_path, version)
+    return _open_caches[key]
+
+def _score_reference(task: Tuple[str, str, List[Tuple[str, str]], Optional[str], Normalizer, bool]):
+    """
+    Unidade de trabalho: normaliza uma referência e calcula o registro de
+    métricas (WER, MER, WIL, CER e contagens) de todas as hipóteses
+    correspondentes. Fica no nível do módulo para ser serializável pelo pool
+    de processos.
+    Pares já presentes no cache não são recalculados; os novos resultados e os
+    acertos são devolvidos para que apenas o processo principal escreva no cache.
+    Os arquivos são lidos em fluxo: o texto normalizado inteiro nunca é
+    montado, apenas o hash (incremental) e os IDs do vocabulário compartilhado.
+    Com collect_confusions, devolve também os eventos de erro de cada motor
+    como pares de palavras (os IDs só valem dentro deste processo); eles
+    ficam gravados no registro do cache, então pares já vistos não são
+    alinhados de novo.
+    """
+    manual_prefix, manual_file_path, ai_files, cache_path, normalizer, collect_confusions = task
+    labels = [label for label, _ in ai_files]
+
+    keys, ai_ids = [], []
+    manual_ids, manual_hash = stream_transcript(manual_file_path, VOCABULARY, normalizer)
+    for _, ai_file_path in ai_files:
+        ids, ai_hash = stream_transcript(ai_file_path, VOCABULARY, normalizer)
+        keys.append((manual_hash, ai_hash))
+        ai_ids.append(ids)
+    cached = _get_cache(cache_path, normalization_version(normalizer)).get_many(keys) if cache_path else {}
+
+    # Pares do cache gravados sem os eventos de erro (execução sem confusões) são recalculados
+    missing = [i for i, key in enumerate(keys)
+               if key not in cached or (collect_confusions and CONFUSIONS_FIELD not in cached[key])]
+    confusions = [] if collect_confusions else None
+    scores = batch_metrics_ids(manual_ids, [ai_ids[i] for i in missing], VOCABULARY, confusions) if missing else []
+    if collect_confusions:
+        for score, counts in zip(scores, confusions):
+            score[CONFUSIONS_FIELD] = [[ref_word, hyp_word, count]
+                                       for (ref_word, hyp_word), count in to_word_pairs(counts, VOCABULARY).items()]
+    computed = {keys[i]: score for i, score in zip(missing, scores)}
+    touched = [key for key in cached if key not in computed]
+
+    records = [computed[key] if key in computed else cached[key] for key in keys]
+    pair_confusions = {}
+    if collect_confusions:
+        for label, record in zip(labels, records):
+            pair_confusions[label] = {(ref_word, hyp_word): count
+                                      for ref_word, hyp_word, count in record[CONFUSIONS_FIELD]}
+
+    values = [{field: record[field] for field in METRIC_FIELDS} for record in records]
+    return manual_prefix, dict(zip(labels, values)), computed, touched, pair_confusions
+
+def metrics_results_batch(manual_transcription_folder_path: str, ai_transcription_folders: Dict[str, str],
+                          workers: int = 1, cache_path: Optional[str] = None,
+                          normalizer: Optional[Normalizer] = None,
+                          confusion_index: Optional[ConfusionIndex] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Calcula as métricas de todos os motores de IA de uma vez.
+    Cada transcrição manual é lida e normalizada uma única vez e comparada
+    com as transcrições de todos os motores que possuem o mesmo prefixo.
+    Com workers > 1, as referências são distribuídas em um pool de processos;
+    a ordem do resultado é a mesma do caminho serial.
+    Com cache_path, pares (referência, hipótese) inalterados são lidos do cache.
+    normalizer define a normalização (padrão: DEFAULT_NORMALIZER) e segue
+    junto com cada tarefa para os processos do pool.
+    Com confusion_index, os eventos de erro (substituições, deleções e
+    inserções) de cada par são somados a ele, reaproveitando o alinhamento
+    usado nas métricas.
+    Retorna um dicionário {prefixo: {label do motor: registro de métricas}}.
+    """
+    normalizer = normalizer or DEFAULT_NORMALIZER
+    tasks = [(*task, cache_path, normalizer, confusion_index is not None)
+             for task in _build_tasks(manual_transcription_folder_path, ai_transcription_folders)]
+
+    if cache_path:
+        cache = _get_cache(cache_path, normalization_version(normalizer))  # cria a tabela antes do pool
+
+    if workers > 1 and len(tasks) > 1:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scored = list(executor.map(_score_reference, tasks, chunksize=chunksize))
+    else:
+        scored = [_score_reference(task) for task in tasks]
+
+    if cache_path:
+        computed, touched = {}, []
+        for _, _, new_entries, hits, _ in scored:
+            computed.update(new_entries)
+            touched.extend(hits)
+        cache.put_many(computed, touched)
+
+    if confusion_index is not None:
+        for _, _, _, _, pair_confusions in scored:
+            for label, pairs in pair_confusions.items():
+                confusion_index.add_word_pairs(label, pairs)
+
+    return {manual_prefix: values for manual_prefix, values, _, _, _ in scored}
+
+def wer_results_batch(manual_transcription_folder_path: str, ai_transcription_folders: Dict[str, str],
+                      workers: int = 1, cache_path: Optional[str] = None,
+                      normalizer: Optional[Normalizer] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Calcula o WER de todos os motores de IA de uma vez.
+    Retorna um dicionário {prefixo: {label do motor: WER}}.
+    """
+    metrics = metrics_results_batch(manual_transcription_folder_path, ai_transcription_folders, workers, cache_path,
+                                    normalizer)
+    return {
+        manual_prefix: {label: record['wer'] for label, record in records.items()}
+        for manual_prefix, records in metrics.items()
+    }
 
 def wer_results(manual_transcription_folder_path: str, ai_transcription_folder_path: str) -> Dict[str, Dict[str, float]]:
     """
     Calcula o WER para todos os arquivos que possuem o mesmo prefixo antes do primeiro '_'.
     Retorna um dicionário com o prefixo como chave e o WER como valor.
     """
-    # Definir caminhos - partir da pasta wer atual
-    current_dir = os.path.dirname(os.path.abspath(__file__))  # pasta wer
-    parent_dir = os.path.dirname(current_dir)  # Datasets_Audios_Medicos
-    
-    # Construir caminhos completos
-    manual_path = os.path.join(parent_dir, manual_transcription_folder_path)
-    ai_path = os.path.join(parent_dir, ai_transcription_folder_path)
-    
-    # Verificar se os diretórios existem
-    if not os.path.exists(manual_path):
-        raise FileNotFoundError(f"Diretório não encontrado: {manual_path}")
-    if not os.path.exists(ai_path):
-        raise FileNotFoundError(f"Diretório não encontrado: {ai_path}")
-    
-    manual_transcription_list = os.listdir(manual_path)
-    ai_transcription_list = os.listdir(ai_path)
-    
-    results = {}
-
-    for manual_filename in manual_transcription_list:
-        manual_prefix = manual_filename.split('_')[0]
-
-        ai_filename = next(
-            (f for f in ai_transcription_list if f.split('_')[0] == manual_prefix),
-            None
-        )
-
-        if ai_filename is None:
-            continue  # pula se não encontrar correspondente
-
-        manual_file_path = os.path.join(manual_path, manual_filename)
-        ai_file_path = os.path.join(ai_path, ai_filename)
-
-        manual_text = normalize_transcript(manual_file_path)
-        ai_text = normalize_transcript(ai_file_path)
-        current_wer = wer_test(manual_text, ai_text)
-
-        results[manual_prefix] = {"wer": current_wer}
-
-    return results
+    return wer_results_batch(manual_transcription_folder_path, {"wer": ai_transcription_folder_path})
 
-def get_time_duration(json_folder_path: str) -> Dict[str, float]:
+def windowed_wer(t_real: str, segments: List[Segment], window_seconds: float,
+                 duration: Optional[float] = None, normalizer: Optional[Normalizer] = None) -> pd.DataFrame:
     """
-    Retorna a duração do arquivo de áudio em segundos.
+    WER por janela de tempo de uma hipótese com marcações de tempo.
+    t_real é a referência normalizada; segments são os segmentos da
+    transcrição da IA (timestamps.parse_transcript). Usa um único alinhamento
+    para todas as janelas.
     """
-    # Definir caminhos - partir da pasta wer atual
-    current_dir = os.path.dirname(os.path.abspath(__file__))  # pasta wer
-    parent_dir = os.path.dirname(current_dir)  # Datasets_Audios_Medicos
-    
-    # Construir caminho completo
-    json_path = os.path.join(parent_dir, json_folder_path)
-    
-    # Verificar se o diretório existe
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f"Diretório não encontrado: {json_path}")
+    segment_ids = [VOCABULARY.encode(normalize_text(segment.text, normalizer).split()) for segment in segments]
+    ai_ids, word_times = hypothesis_word_times(segment_ids, [segment.start for segment in segments], duration)
 
-    times = {}
-    for item in os.listdir(json_path):
-        if item .endswith('.json'):
-            file_path = os.path.join(json_path, item)
-            item_name = item.split('_')[0]
+    ref_ids = VOCABULARY.encode(t_real.split())
+    return window_scores(align_words(ref_ids, ai_ids), word_times, window_seconds, duration)
 
+def windowed_results_batch(manual_transcription_folder_path: str, ai_transcription_folders: Dict[str, str],
+                           window_seconds: float = 60.0, durations: Optional[Dict[str, float]] = None,
+                           normalizer: Optional[Normalizer] = None) -> pd.DataFrame:
+    """
+    Calcula o WER por janela de tempo de cada motor em cada áudio.
+    Só entram hipóteses com marcações de tempo (ex.: Gemini e GPT).
+    Retorna uma tabela longa com áudio, motor, início/fim da janela, palavras, erros e WER.
+    """
+    durations = durations or {}
+    frames = []
+    for manual_prefix, manual_file_path, ai_files in _build_tasks(manual_transcription_folder_path,
+                                                                  ai_transcription_folders):
+        manual_text = normalize_transcript(manual_file_path, normalizer)
+        for label, ai_file_path in ai_files:
+            with open(ai_file_path, 'r', encoding='utf-8') as f:
+                segments = parse_transcript(f.read())
+            if not has_timestamps(segments):
+                continue
 
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            scores = windowed_wer(manual_text, segments, window_seconds, durations.get(manual_prefix), normalizer)
+            scores.insert(0, "Modelo", label)
+            scores.insert(0, "ID Áudio", manual_prefix)
+            frames.append(scores)
 
-            duration = data['duracao']
+    columns = ["ID Áudio", "Modelo", "window_start", "window_end", "ref_words", "errors", "wer"]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
 
-            times[item_name] = duration
-        else:
-            # Se não for um arquivo JSON, ignora
+def cpwer_results_batch(manual_transcription_folder_path: str, ai_transcription_folders: Dict[str, str],
+                        workers: int = 1, normalizer: Optional[Normalizer] = None) -> pd.DataFrame:
+    """
+    Calcula o cpWER (WER com a melhor correspondência entre locutores) de cada
+    motor em cada áudio. Só entram pares em que a referência e a transcrição
+    da IA têm rótulos de locutor por linha ("Médico:", "Speaker 1:", ...).
+    A matriz de custos entre locutores usa workers processos.
+    Retorna uma tabela longa com áudio, motor, locutores, erros, palavras,
+    cpWER e a correspondência encontrada.
+    """
+    normalizer = normalizer or DEFAULT_NORMALIZER
+    columns = ["ID Áudio", "Modelo", "ref_speakers", "hyp_speakers", "errors", "ref_words", "cpwer", "assignment"]
+    rows = []
+    for manual_prefix, manual_file_path, ai_files in _build_tasks(manual_transcription_folder_path,
+                                                                  ai_transcription_folders):
+        with open(manual_file_path, 'r', encoding='utf-8') as f:
+            ref_speakers = split_speakers(f.read())
+        if not ref_speakers:
             continue
-    return times
+        ref_names = list(ref_speakers)
+        ref_ids = [VOCABULARY.encode(normalizer(text).split()) for text in ref_speakers.values()]
+
+        for label, ai_file_path in ai_files:
+            with open(ai_file_path, 'r', encoding='utf-8') as f:
+                hyp_speakers = split_speakers(f.read())
+            if not hyp_speakers:
+                continue
+            hyp_names = list(hyp_speakers)
+            hyp_ids = [VOCABULARY.encode(normalizer(text).split()) for text in hyp_speakers.values()]
+
+            result = cp_word_error_rate(ref_ids, hyp_ids, workers)
+            assignment = '; '.join(f"{ref_names[i]} -> {hyp_names[j] if j is not None else '-'}"
+                                   for i, j in enumerate(result['assignment']))
+            rows.append((manual_prefix, label, len(ref_names), len(hyp_names), result['errors'],
+                         result['ref_words'], result['cpwer'], assignment))
+    return pd.DataFrame(rows, columns=columns)
+
+def get_term_matcher(lexicon_path: str = DEFAULT_LEXICON_PATH,
+                     normalizer: Optional[Normalizer] = None) -> TermMatcher:
+    """
+    Retorna o autômato de termos do léxico, construído uma única vez por
+    arquivo e normalização. Os termos recebem a mesma normalização das
+    transcrições e são convertidos em IDs do vocabulário compartilhado.
+    """
+    normalizer = normalizer or DEFAULT_NORMALIZER
+    key = (lexicon_path, normalizer.fingerprint)
+    if key not in _matchers:
+        terms = load_lexicon(lexicon_path, normalizer)
+        _matchers[key] = TermMatcher(VOCABULARY.encode(term) for term in terms)
+    return _matchers[key]
+
+def term_results_batch(manual_transcription_folder_path: str, ai_transcription_folders: Dict[str, str],
+                       lexicon_path: str = DEFAULT_LEXICON_PATH,
+                       normalizer: Optional[Normalizer] = None) -> pd.DataFrame:
+    """
+    Localiza os termos do léxico médico na referência e em cada hipótese.
+    Retorna uma tabela longa com áudio, motor, termo e as ocorrências na
+    referência, na hipótese e reconhecidas (mínimo das duas).
+    """
+    matcher = get_term_matcher(lexicon_path, normalizer)
+    rows = []
+    for manual_prefix, manual_file_path, ai_files in _build_tasks(manual_transcription_folder_path,
+                                                                  ai_transcription_folders):
+        ref_counts = matcher.count(tokenize_transcript(manual_file_path, normalizer))
+        for label, ai_file_path in ai_files:
+            hyp_counts = matcher.count(tokenize_transcript(ai_file_path, normalizer))
+            for term, (ref_count, hyp_count, matched) in term_matches(ref_counts, hyp_counts).items():
+                term_text = ' '.join(VOCABULARY.decode(matcher.terms[term]))
+                rows.append((manual_prefix, label, term_text, ref_count, hyp_count, matched))
+
+    columns = ["ID Áudio", "Modelo", "Termo", "ref_terms", "hyp_terms", "matched_terms"]
+    return pd.DataFrame(rows, columns=columns)
+
+def get_time_duration(json_folder_path: str) -> Dict[str, float]:
+    """
+    Retorna a duração do arquivo de áudio em segundos.
+    Os valores vêm do manifest do dataset (sem reabrir os JSONs inalterados).
+    """
+    _dataset_path(json_folder_path)
+    audios = build_manifest(metadata_folder=json_folder_path)
+    return {
+        audio_id: audio['duracao']
+        for audio_id, audio in audios.items()
+        if json_folder_path in audio['files']
+    }
+
+def get_model_versions(engine_keys: Dict[str, str], config_path: str = MODELS_CONFIG_PATH) -> Dict[str, str]:
+    """
+    Retorna {label do motor: versão do modelo} a partir do "model_name" de
+    cada motor no models_api.json (engine_keys mapeia label -> chave do JSON).
+    Motores sem "model_name" (ou sem o arquivo) ficam de fora.
+    """
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return {
+        label: config[key]["model_name"]
+        for label, key in engine_keys.items()
+        if config.get(key, {}).get("model_name")
+    }
+
+def model_version_arg(value: str) -> Tuple[str, str]:
+    """
+    Converte um argumento --model-version "MOTOR=VERSÃO" em (motor, versão),
+    para o argparse recusar valores sem "=" ou com um dos lados vazio.
+    """
+    engine, separator, version = value.partition('=')
+    if not separator or not engine.strip() or not version.strip():
+        raise argparse.ArgumentTypeError(f"use MOTOR=VERSÃO (recebido: {value!r})")
+    return engine.strip(), version.strip()
+
+def get_metadata(json_folder_path: str) -> pd.DataFrame:
+    """
+    Retorna os metadados de cada áudio (duração, categoria, fonte e
+    quantidade de vozes), indexados por "ID Áudio", a partir do manifest.
+    """
+    _dataset_path(json_folder_path)
+    audios = build_manifest(metadata_folder=json_folder_path)
+    metadata = pd.DataFrame.from_dict(
+        {audio_id: {field: audio.get(field) for field in METADATA_FIELDS}
+         for audio_id, audio in audios.items() if json_folder_path in audio['files']},
+        orient='index', columns=list(METADATA_FIELDS),
+    )
+    metadata.index.name = "ID Áudio"
+    return metadata
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula o WER das transcrições de IA contra as manuais.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de processos usados no cálculo (padrão: 1, serial)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                        help="Arquivo SQLite do cache de resultados")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recalcula todos os pares sem usar o cache")
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES,
+                        help="Número de reamostragens do bootstrap e da permutação")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Semente dos sorteios (resultados reprodutíveis)")
+    parser.add_argument("--window", type=float, default=0,
+                        help="Tamanho da janela em segundos para o WER por trecho (0 desativa)")
+    parser.add_argument("--lexicon", default=DEFAULT_LEXICON_PATH,
+                        help="Léxico de termos médicos, um termo por linha (vazio desativa)")
+    parser.add_argument("--top-k", type=int, default=50,
+                        help="Confusões mais frequentes exportadas por motor e tipo (0 desativa)")
+    parser.add_argument("--cpwer", action="store_true",
+                        help="Calcula o cpWER por locutor quando as transcrições têm rótulos de locutor")
+    parser.add_argument("--keep-numbers", action="store_true",
+                        help="Não escreve números e unidades por extenso na normalização")
+    parser.add_argument("--fold-accents", action="store_true",
+                        help="Remove acentos e cedilha na normalização")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH,
+                        help="Arquivo SQLite onde cada execução é acrescentada ao histórico (vazio desativa)")
+    parser.add_argument("--history-sheet", action="store_true",
+                        help="Inclui o histórico de execuções na planilha (IDs e datas mudam a cada execução, "
+                             "então a planilha deixa de ser idêntica entre execuções; ver results_store.py)")
+    parser.add_argument("--model-version", action="append", default=[], type=model_version_arg,
+                        metavar="MOTOR=VERSÃO",
+                        help="Versão do modelo de um motor, quando não está no models_api.json (repetível)")
+    parser.add_argument("--excel", default="resultados_wer.xlsx",
+                        help="Planilha exportada ao final da execução (vazio desativa)")
+    args = parser.parse_args()
+    if args.history_sheet and not args.results:
+        parser.error("--history-sheet requer --results")
+    normalizer = Normalizer(expand_numbers=not args.keep_numbers, fold_accents=args.fold_accents)
+
     manual_transcription_folder_path = 'Transcriptions/manual_transcriptions'
     ai_transcription_folder_path_list = [
         'Transcriptions/ai_transcriptions/transcription_aws',
@@ -119,78 +520,221 @@ if __name__ == "__main__":
         'Transcriptions/ai_transcriptions/transcription_gpt4o'
     ]
     ai_labels = ['AWS', 'Azure', 'GCP', 'Gemini', 'GPT4o']
-
-    # Inicializa DataFrame
-    final_results = {}
-
-    for folder, label in zip(ai_transcription_folder_path_list, ai_labels):
-        ai_wer = wer_results(manual_transcription_folder_path, folder)
-        for audio_name, wer_value in ai_wer.items():
-            if audio_name not in final_results:
-                final_results[audio_name] = {}
-            final_results[audio_name][label] = f"{round(wer_value['wer'] * 100, 2)}%"
+    model_versions = get_model_versions(dict(zip(ai_labels, ['aws', 'azure', 'gcp', 'gemini', 'gpt'])))
+    unknown = sorted({engine for engine, _ in args.model_version} - set(ai_labels))
+    if unknown:
+        parser.error(f"--model-version: motor desconhecido {', '.join(unknown)} (use um de {', '.join(ai_labels)})")
+    model_versions.update(args.model_version)
+
+    # Cada referência é normalizada uma vez e comparada com todos os motores
+    confusoes = ConfusionIndex(VOCABULARY) if args.top_k > 0 else None
+    ai_metrics = metrics_results_batch(manual_transcription_folder_path,
+                                       dict(zip(ai_labels, ai_transcription_folder_path_list)),
+                                       workers=args.workers,
+                                       cache_path=None if args.no_cache else args.cache,
+                                       normalizer=normalizer,
+                                       confusion_index=confusoes)
 
     # Pega duração de cada áudio
     durations = get_time_duration('Transcriptions/json')
 
-    for audio_name, duration in durations.items():
-        if audio_name in final_results:
-            final_results[audio_name]["Duração (s)"] = round(duration, 2)
+    # Tabela longa numérica (WER, contagens e duração) usada por todas as agregações
+    df_metricas = build_results_table(ai_metrics, durations)
 
-    # Converte pra DataFrame
-    df = pd.DataFrame.from_dict(final_results, orient='index')
-    df.index.name = "ID Áudio"
-    df = df.reset_index()
+    # Acrescenta a execução ao histórico; o relatório é montado a partir do que foi gravado
+    if args.results:
+        store = ResultsStore(args.results)
+        run_id = store.append_run(df_metricas, normalization_version(normalizer), model_versions, options={
+            "expand_numbers": normalizer.expand_numbers,
+            "fold_accents": normalizer.fold_accents,
+        })
+        df_metricas = store.load_run(run_id)
+        if args.history_sheet:
+            df_historico = format_percent(store.run_history(ai_labels), ["corpus_wer", "weighted_wer"],
+                                          suffix=False)
+        store.close()
+        print(f"\n Execução {run_id} acrescentada a '{args.results}'")
+
+    # Tabela larga: um áudio por linha, WER de cada motor nas colunas
+    df = wer_by_audio(df_metricas, ai_labels)
+    df["Duração (s)"] = df["Duração (s)"].round(2)
+    df = format_percent(df, ai_labels)
 
     # Mostra no terminal
     print("\n Resultados de WER por motor de IA:\n")
     print(df)
 
-    # Exporta para Excel
-    df.to_excel("resultados_wer.xlsx", index=False)
-    print("\n Arquivo 'resultados_wer.xlsx' salvo com sucesso")
-
-        # ============================
+    # ============================
     # Cálculo de Média Ponderada
     # ============================
-    ponderadas = []
-
-    for model in ai_labels:
-        soma_ponderada = 0
-        soma_tempos = 0
+    resumo = engine_summary(df_metricas)
+    df_ponderada = format_percent(
+        resumo[["Modelo", "weighted_wer", "corpus_wer", "mean_wer", "median_wer", "files", "errors", "ref_words"]],
+        ["weighted_wer", "corpus_wer", "mean_wer", "median_wer"],
+        suffix=False,
+    ).rename(columns={
+        "weighted_wer": "Média WER Ponderada (%)",
+        "corpus_wer": "WER do Corpus (%)",
+        "mean_wer": "Média WER Simples (%)",
+        "median_wer": "Mediana WER (%)",
+        "files": "Arquivos",
+        "errors": "Total de Erros",
+        "ref_words": "Palavras na Referência",
+    })
 
-        for _, row in df.iterrows():
-            tempo = row.get("Duração (s)")
-            wer_str = row.get(model)
+    # Mostra no terminal
+    print("\nMédia ponderada de WER por modelo (peso = tempo de áudio):\n")
+    print(df_ponderada)
 
-            if pd.isna(tempo) or pd.isna(wer_str):
-                continue
+    # ============================
+    # WER por categoria, fonte e quantidade de vozes (metadados do dataset)
+    # ============================
+    por_grupo = grouped_summary(df_metricas, get_metadata('Transcriptions/json'))
+    df_grupos = format_percent(
+        por_grupo[["Dimensão", "Grupo", "Modelo", "weighted_wer", "corpus_wer", "files", "errors", "ref_words",
+                   "duration"]],
+        ["weighted_wer", "corpus_wer"],
+        suffix=False,
+    ).rename(columns={
+        "weighted_wer": "Média WER Ponderada (%)",
+        "corpus_wer": "WER do Corpus (%)",
+        "files": "Arquivos",
+        "errors": "Total de Erros",
+        "ref_words": "Palavras na Referência",
+        "duration": "Duração (s)",
+    })
+
+    print("\nWER por categoria, fonte e quantidade de vozes:\n")
+    print(df_grupos)
 
-            try:
-                wer_val = float(wer_str.replace('%', ''))
-            except:
-                continue
+    # ============================
+    # Intervalos de confiança e testes pareados entre motores
+    # ============================
+    intervalos, testes = significance_report(df_metricas, n_resamples=args.resamples, seed=args.seed)
+    df_intervalos = format_percent(intervalos, ["wer", "ci_low", "ci_high"], suffix=False).rename(columns={
+        "wer": "WER do Corpus (%)",
+        "ci_low": "IC 95% Inferior (%)",
+        "ci_high": "IC 95% Superior (%)",
+        "files": "Arquivos em Comum",
+    })
+    df_testes = format_percent(testes, ["wer_diff"], suffix=False).rename(columns={
+        "wer_diff": "Diferença de WER (p.p.)",
+        "p_bootstrap": "p-valor Bootstrap",
+        "p_permutation": "p-valor Permutação",
+        "files": "Arquivos em Comum",
+    })
+
+    print("\nIntervalos de confiança (bootstrap) do WER do corpus:\n")
+    print(df_intervalos)
+    print("\nTestes pareados entre motores:\n")
+    print(df_testes)
 
-            soma_ponderada += wer_val * tempo
-            soma_tempos += tempo
+    # ============================
+    # WER por janela de tempo (somente motores com marcações de tempo)
+    # ============================
+    df_janelas = df_janelas_motor = None
+    if args.window > 0:
+        df_janelas = windowed_results_batch(manual_transcription_folder_path,
+                                            dict(zip(ai_labels, ai_transcription_folder_path_list)),
+                                            window_seconds=args.window, durations=durations,
+                                            normalizer=normalizer)
+        df_janelas_motor = (df_janelas.groupby(["Modelo", "window_start", "window_end"], sort=True)
+                            [["ref_words", "errors"]].sum().reset_index())
+        df_janelas_motor["wer"] = df_janelas_motor["errors"] / df_janelas_motor["ref_words"].replace(0, np.nan)
+        df_janelas_motor = format_percent(df_janelas_motor, ["wer"], suffix=False)
+        df_janelas = format_percent(df_janelas, ["wer"], suffix=False)
+
+        print(f"\nWER por janela de {args.window:g} s:\n")
+        print(df_janelas_motor)
 
-        media = soma_ponderada / soma_tempos if soma_tempos else None
-        ponderadas.append({
-            "Modelo": model,
-            "Média WER Ponderada (%)": round(media, 2) if media is not None else "N/A"
+    # ============================
+    # Termos médicos: recall e precisão por motor, ao lado do WER do corpus
+    # ============================
+    df_termos = df_termos_lista = None
+    if args.lexicon:
+        termos = term_results_batch(manual_transcription_folder_path,
+                                    dict(zip(ai_labels, ai_transcription_folder_path_list)),
+                                    lexicon_path=args.lexicon, normalizer=normalizer)
+        # term_summary ordena os motores alfabeticamente; as abas seguem a ordem de ai_labels
+        engine_order = {label: k for k, label in enumerate(ai_labels)}
+        resumo_termos = term_summary(termos, ["Modelo"]).merge(resumo[["Modelo", "corpus_wer"]], on="Modelo")
+        resumo_termos = resumo_termos.sort_values("Modelo", key=lambda column: column.map(engine_order),
+                                                  ignore_index=True)
+        df_termos = format_percent(resumo_termos, ["term_recall", "term_precision", "corpus_wer"],
+                                   suffix=False).rename(columns={
+            "ref_terms": "Termos na Referência",
+            "hyp_terms": "Termos na IA",
+            "matched_terms": "Termos Reconhecidos",
+            "term_recall": "Recall de Termos (%)",
+            "term_precision": "Precisão de Termos (%)",
+            "corpus_wer": "WER do Corpus (%)",
         })
+        termos_lista = term_summary(termos, ["Termo", "Modelo"]).sort_values(
+            ["Termo", "Modelo"], key=lambda column: column.map(engine_order) if column.name == "Modelo" else column,
+            ignore_index=True)
+        df_termos_lista = format_percent(termos_lista,
+                                         ["term_recall", "term_precision"], suffix=False)
 
-    df_ponderada = pd.DataFrame(ponderadas)
+        print("\nTermos médicos reconhecidos por motor:\n")
+        print(df_termos)
 
-    # Mostra no terminal
-    print("\nMédia ponderada de WER por modelo (peso = tempo de áudio):\n")
-    print(df_ponderada)
+    # ============================
+    # Confusões mais frequentes por motor (substituições, deleções e inserções)
+    # ============================
+    df_confusoes = None
+    if confusoes is not None:
+        df_confusoes = confusoes.to_frame(args.top_k)
+        df_confusoes["Tipo"] = df_confusoes["Tipo"].map({
+            "substitution": "Substituição", "deletion": "Deleção", "insertion": "Inserção",
+        })
+
+        print(f"\nSubstituições mais frequentes por motor (top {min(args.top_k, 5)}):\n")
+        print(df_confusoes[df_confusoes["Tipo"] == "Substituição"].groupby("Modelo", sort=False).head(5))
 
     # ============================
-    # Salva ambas as tabelas no Excel
+    # cpWER (transcrições com rótulos de locutor)
     # ============================
-    with pd.ExcelWriter("resultados_wer.xlsx", engine='openpyxl', mode='w') as writer:
-        df.to_excel(writer, sheet_name="WER por Áudio", index=False)
-        df_ponderada.to_excel(writer, sheet_name="Média Ponderada", index=False)
+    df_cpwer = None
+    if args.cpwer:
+        df_cpwer = cpwer_results_batch(manual_transcription_folder_path,
+                                       dict(zip(ai_labels, ai_transcription_folder_path_list)),
+                                       workers=args.workers, normalizer=normalizer)
+        if df_cpwer.empty:
+            print("\nNenhum par com rótulos de locutor na referência e na IA: cpWER não calculado.")
+            df_cpwer = None
+        else:
+            df_cpwer = format_percent(df_cpwer, ["cpwer"], suffix=False)
+            print("\ncpWER por áudio e motor:\n")
+            print(df_cpwer)
 
-    print("\n✅ Arquivo 'resultados_wer.xlsx' atualizado com a aba 'Média Ponderada'.")
\ No newline at end of file
+    # ============================
+    # Exporta todas as tabelas para o Excel (uma única escrita)
+    # ============================
+    if args.excel:
+        with pd.ExcelWriter(args.excel, engine='openpyxl', mode='w') as writer:
+            df.to_excel(writer, sheet_name="WER por Áudio", index=False)
+            df_ponderada.to_excel(writer, sheet_name="Média Ponderada", index=False)
+            df_metricas.to_excel(writer, sheet_name="Métricas por Par", index=False)
+            df_intervalos.to_excel(writer, sheet_name="Intervalos de Confiança", index=False)
+            df_testes.to_excel(writer, sheet_name="Testes Pareados", index=False)
+            sheet_names = {"categoria": "WER por Categoria", "fonte": "WER por Fonte",
+                           "qt_vozes": "WER por Qt Vozes"}
+            for dimension in GROUP_DIMENSIONS:
+                grupo = df_grupos[df_grupos["Dimensão"] == dimension].drop(columns="Dimensão")
+                grupo.rename(columns={"Grupo": dimension}).to_excel(writer, sheet_name=sheet_names[dimension],
+                                                                    index=False)
+            if df_janelas is not None:
+                df_janelas.to_excel(writer, sheet_name="WER por Janela", index=False)
+                df_janelas_motor.to_excel(writer, sheet_name="WER por Janela (Motor)", index=False)
+            if df_termos is not None:
+                df_termos.to_excel(writer, sheet_name="Termos Médicos", index=False)
+                df_termos_lista.to_excel(writer, sheet_name="Termos Médicos por Termo", index=False)
+            if df_confusoes is not None:
+                df_confusoes.to_excel(writer, sheet_name="Confusões", index=False)
+            if df_cpwer is not None:
+                df_cpwer.to_excel(writer, sheet_name="cpWER", index=False)
+            if args.history_sheet:
+                df_historico.to_excel(writer, sheet_name="Histórico", index=False)
+        pin_excel_timestamps(args.excel)
+
+        print(f"\n✅ Arquivo '{args.excel}' salvo com as abas de médias, métricas e significância.")
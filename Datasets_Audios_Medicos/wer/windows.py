@@ -0,0 +1,93 @@
+# WER por janela de tempo (segment-level) a partir do alinhamento e das marcações de tempo
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from alignment import Operation
+from timestamps import Segment
+
+
+def hypothesis_word_times(segment_words: Sequence[Sequence[int]], segment_starts: Sequence[Optional[float]],
+                          end_time: Optional[float] = None) -> Tuple[List[int], np.ndarray]:
+    """
+    Achata as palavras (IDs do vocabulário) dos segmentos e estima o instante de cada palavra,
+    distribuindo-as uniformemente entre o início do segmento e o início do
+    próximo (ou end_time, no último). Segmentos antes da 1ª marcação começam em 0.
+
+    O índice de intervalos é o vetor de inícios dos segmentos em palavras:
+    cada palavra encontra seu segmento por busca binária (np.searchsorted).
+    """
+    words = [word for segment in segment_words for word in segment]
+    counts = np.array([len(segment) for segment in segment_words], dtype=np.int64)
+    starts = np.array([0.0 if start is None else start for start in segment_starts], dtype=np.float64)
+    if not words:
+        return words, np.zeros(0)
+
+    # Fim de cada segmento = início do próximo; o último usa end_time (ou o próprio início)
+    ends = np.append(starts[1:], end_time if end_time is not None else starts[-1])
+    ends = np.maximum(ends, starts)
+
+    first_word = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = np.arange(len(words))
+    segment = np.searchsorted(first_word, positions, side='right') - 1
+    # Segmentos vazios compartilham o mesmo first_word; searchsorted pega o último deles
+    fraction = (positions - first_word[segment]) / np.maximum(counts[segment], 1)
+    times = starts[segment] + fraction * (ends[segment] - starts[segment])
+    return words, times
+
+
+def window_scores(ops: Sequence[Operation], word_times: np.ndarray, window_seconds: float,
+                  end_time: Optional[float] = None) -> pd.DataFrame:
+    """
+    Projeta um único alinhamento nas janelas de tempo da hipótese e retorna,
+    por janela, o número de palavras da referência, erros e o WER.
+
+    Palavras da hipótese (acertos, substituições e inserções) caem na janela do
+    seu instante; deleções herdam a janela da última palavra da hipótese
+    anterior a elas (ou da primeira, no início do áudio). Com a hipótese
+    vazia, todas as palavras da referência são deleções e caem na janela da
+    sua posição na referência, distribuídas uniformemente entre 0 e end_time
+    (sem end_time, ficam todas na primeira janela).
+    """
+    columns = ["window_start", "window_end", "ref_words", "errors", "wer"]
+    if not ops:
+        return pd.DataFrame(columns=columns)
+
+    kinds = np.array([op for op, _, _ in ops])
+    if len(word_times) == 0:
+        times = np.arange(len(ops)) * ((end_time or 0.0) / len(ops))
+    else:
+        hyp_index = np.array([-1 if j is None else j for _, _, j in ops], dtype=np.int64)
+
+        # Deleções: propaga o índice da última palavra da hipótese vista
+        filled = np.maximum.accumulate(hyp_index)
+        filled[filled < 0] = 0
+        times = word_times[filled]
+
+    window = np.floor(times / window_seconds).astype(np.int64)
+    is_ref = kinds != 'insert'
+    is_error = kinds != 'equal'
+
+    size = window.max() + 1
+    ref_words = np.bincount(window, weights=is_ref, minlength=size)
+    errors = np.bincount(window, weights=is_error, minlength=size)
+    present = np.flatnonzero((ref_words > 0) | (errors > 0))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        wer = errors[present] / ref_words[present]
+    return pd.DataFrame({
+        "window_start": present * window_seconds,
+        "window_end": (present + 1) * window_seconds,
+        "ref_words": ref_words[present].astype(np.int64),
+        "errors": errors[present].astype(np.int64),
+        "wer": wer,
+    }, columns=columns)
+
+
+def has_timestamps(segments: Sequence[Segment]) -> bool:
+    """
+    Indica se a transcrição tem ao menos uma marcação de tempo.
+    """
+    return any(segment.start is not None for segment in segments)
@@ -0,0 +1,132 @@
+import os
+import time
+import hashlib
+import tempfile
+from functools import lru_cache
+from typing import Callable, Optional
+
+# Pasta e orçamento de disco padrão (AUDIO_CACHE_DIR e AUDIO_CACHE_MAX_MB no .env têm prioridade)
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_cache")
+DEFAULT_MAX_MB = 2048
+
+# Arquivos temporários de conversões interrompidas mais antigos que isso são apagados na limpeza
+STALE_PART_SECONDS = 3600
+PART_SUFFIX = ".part"
+
+HASH_BUFFER_SIZE = 1 << 20
+
+
+@lru_cache(maxsize=4096)
+def _content_hash(file_path: str, size: int, mtime_ns: int) -> str:
+    """SHA-256 do conteúdo, lido em blocos; memoizado por (caminho, tamanho, mtime)."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(file_path: str) -> str:
+    """Hash do conteúdo do arquivo (não depende do nome nem da pasta)."""
+    stat = os.stat(file_path)
+    return _content_hash(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+class AudioCache:
+    """
+    Cache de áudios pré-processados (mono, reamostrados, convertidos),
+    compartilhado entre os pipelines (GCP, GPT) e entre execuções.
+
+    A chave é o hash do conteúdo do áudio de origem mais os parâmetros de
+    saída (canais, taxa de amostragem, codec): se a origem muda, a chave
+    muda; o mesmo áudio com nome diferente reaproveita a conversão.
+    Cada conversão é gravada em um arquivo temporário na mesma pasta e
+    renomeada no fim (os.replace), então nunca se lê um arquivo pela metade.
+    Acima de max_mb, os arquivos usados há mais tempo são apagados (LRU).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_mb: Optional[float] = None):
+        self.cache_dir = cache_dir or os.getenv("AUDIO_CACHE_DIR") or DEFAULT_CACHE_DIR
+        max_mb = max_mb if max_mb is not None else float(os.getenv("AUDIO_CACHE_MAX_MB") or DEFAULT_MAX_MB)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, source_path: str, channels: Optional[int] = None, sample_rate: Optional[int] = None,
+                 codec: str = "pcm_s16le", ext: str = "wav") -> str:
+        """Caminho da entrada no cache para a origem e os parâmetros de saída."""
+        key = "_".join([
+            content_hash(source_path),
+            f"{channels}ch" if channels else "orig-ch",
+            f"{sample_rate}hz" if sample_rate else "orig-hz",
+            codec,
+        ])
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def convert(self, source_path: str, converter: Callable[[str, str], object], channels: Optional[int] = None,
+                sample_rate: Optional[int] = None, codec: str = "pcm_s16le", ext: str = "wav") -> Optional[str]:
+        """
+        Retorna o caminho do áudio convertido, chamando converter(origem, destino)
+        apenas se a conversão ainda não estiver no cache. channels e sample_rate
+        None significam "mantém o da origem". O converter deve gravar no destino
+        recebido e retornar algo falso em caso de erro (nesse caso retorna None).
+        """
+        target_path = self.path_for(source_path, channels, sample_rate, codec, ext)
+        try:
+            os.utime(target_path)  # já convertido: marca como usado agora (ordem do LRU)
+            return target_path
+        except FileNotFoundError:
+            pass
+
+        fd, part_path = tempfile.mkstemp(dir=self.cache_dir, prefix=os.path.basename(target_path) + ".",
+                                         suffix=PART_SUFFIX + "." + ext)
+        os.close(fd)
+        try:
+            if not converter(source_path, part_path) or not os.path.getsize(part_path):
+                return None
+            os.replace(part_path, target_path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+        self.evict(keep=target_path)
+        return target_path
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Apaga as entradas menos usadas recentemente até o cache caber no
+        orçamento (nunca a entrada keep) e os temporários abandonados.
+        Retorna o número de arquivos apagados.
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if PART_SUFFIX in entry.name:
+                    if now - stat.st_mtime > STALE_PART_SECONDS:
+                        removed += self._remove(entry.path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(self.cache_dir, entry.name)))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                total -= size
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        """Apaga um arquivo; outro processo pode tê-lo apagado antes."""
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
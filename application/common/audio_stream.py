@@ -0,0 +1,92 @@
+import json
+import wave
+import subprocess
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+
+class PcmFormat(NamedTuple):
+    """Formato do PCM entregue pelos geradores (bytes intercalados por canal)."""
+    sample_rate: int
+    channels: int
+    sample_width: int  # bytes por amostra
+
+
+def wav_pcm_format(file_path: str) -> Optional[PcmFormat]:
+    """Formato de um WAV PCM (None se o arquivo não for WAV PCM legível pelo módulo wave)."""
+    try:
+        with wave.open(file_path, 'rb') as wav_file:
+            return PcmFormat(wav_file.getframerate(), wav_file.getnchannels(), wav_file.getsampwidth())
+    except (wave.Error, EOFError):
+        return None
+
+
+def probe_pcm_format(file_path: str) -> PcmFormat:
+    """Taxa e canais da primeira faixa de áudio pelo ffprobe (lê só os cabeçalhos, sem decodificar)."""
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=sample_rate,channels",
+        "-of", "json",
+        file_path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Erro ao ler o formato de {file_path} com o ffprobe: {result.stderr.strip()}")
+    streams = json.loads(result.stdout or "{}").get("streams") or []
+    if not streams:
+        raise ValueError(f"Nenhuma faixa de áudio em {file_path}")
+    return PcmFormat(int(streams[0]["sample_rate"]), int(streams[0]["channels"]), 2)
+
+
+def iter_pcm_segments(file_path: str, segment_seconds: float, sample_rate: Optional[int] = None,
+                      channels: Optional[int] = None) -> Iterator[Tuple[bytes, PcmFormat]]:
+    """
+    Gera o áudio decodificado em segmentos de segment_seconds, um por vez,
+    como (bytes PCM, formato). Só o segmento atual fica em memória, então o
+    pico não depende da duração do arquivo.
+    - WAV PCM no formato pedido (ou sem formato pedido): quadros lidos em sequência.
+    - Outros arquivos: um único ffmpeg decodifica para PCM 16 bits em um pipe,
+      lido um segmento por vez; sample_rate e channels não informados são os
+      da origem, lidos pelo ffprobe.
+    """
+    fmt = wav_pcm_format(file_path)
+    if fmt is not None and sample_rate in (None, fmt.sample_rate) and channels in (None, fmt.channels):
+        frames_per_segment = max(1, int(segment_seconds * fmt.sample_rate))
+        with wave.open(file_path, 'rb') as wav_file:
+            while True:
+                data = wav_file.readframes(frames_per_segment)
+                if not data:
+                    return
+                yield data, fmt
+
+    if sample_rate is None or channels is None:
+        source = probe_pcm_format(file_path)
+        sample_rate = sample_rate or source.sample_rate
+        channels = channels or source.channels
+    fmt = PcmFormat(sample_rate, channels, 2)
+    segment_bytes = max(1, int(segment_seconds * sample_rate)) * channels * fmt.sample_width
+    cmd = [
+        "ffmpeg",
+        "-v", "error",
+        "-i", file_path,
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "-ac", str(channels),
+        "pipe:1",
+    ]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+        try:
+            while True:
+                data = process.stdout.read(segment_bytes)  # bloqueia até completar o segmento ou acabar o áudio
+                if not data:
+                    break
+                yield data, fmt
+        finally:
+            if process.poll() is None:  # gerador fechado antes do fim: encerra o ffmpeg
+                process.kill()
+        errors = process.stderr.read().decode('utf-8', 'replace')
+    if process.returncode != 0:
+        raise RuntimeError(f"Erro ao decodificar {file_path} com o ffmpeg: {errors.strip()}")
+
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import shutil
+import tempfile
+import tracemalloc
+import wave
+
+# Adicionar o diretório atual ao path para importar o módulo
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from audio_stream import iter_pcm_segments, probe_pcm_format
+
+SEGMENT_SECONDS = 30
+SAMPLE_RATE = 44100
+CHANNELS = 2
+
+
+def write_wav(path: str, minutes: int) -> None:
+    """WAV estéreo 16 bits com ruído, gravado um segundo por vez."""
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(CHANNELS)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        second = os.urandom(2 * CHANNELS * SAMPLE_RATE)
+        for _ in range(minutes * 60):
+            wav_file.writeframes(second)
+
+
+def streaming_peak(path: str, **kwargs):
+    """Pico de memória (tracemalloc) e número de segmentos ao percorrer o arquivo em fluxo."""
+    tracemalloc.start()
+    segments = 0
+    for _ in iter_pcm_segments(path, SEGMENT_SECONDS, **kwargs):
+        segments += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, segments
+
+
+if __name__ == "__main__":
+    try:
+        segment_bytes = SEGMENT_SECONDS * SAMPLE_RATE * CHANNELS * 2
+        peaks = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # O pico em fluxo fica em torno de um segmento e não cresce com a duração do arquivo
+            for minutes in (2, 8, 32):
+                path = os.path.join(temp_dir, f"audio_{minutes}min.wav")
+                write_wav(path, minutes)
+                peak, segments = streaming_peak(path)
+                assert segments == minutes * 60 // SEGMENT_SECONDS, (minutes, segments)
+                assert peak <= 2 * segment_bytes + (1 << 20), (minutes, peak)
+                peaks.append(peak)
+                print(f"{minutes:>2} min ({os.path.getsize(path) / 2 ** 20:.0f} MB, {segments} segmentos de "
+                      f"{SEGMENT_SECONDS} s): pico em fluxo {peak / 2 ** 20:.1f} MB")
+                if minutes != 2:
+                    os.remove(path)
+            assert max(peaks) - min(peaks) < (1 << 20), peaks
+
+            # Caminho do ffmpeg (formato lido pelo ffprobe, sem decodificar antes)
+            if shutil.which("ffmpeg") and shutil.which("ffprobe"):
+                path = os.path.join(temp_dir, "audio_2min.wav")
+                assert probe_pcm_format(path) == (SAMPLE_RATE, CHANNELS, 2)
+                peak, segments = streaming_peak(path, sample_rate=16000)
+                assert segments == 4 and peak <= 2 * SEGMENT_SECONDS * 16000 * CHANNELS * 2 + (1 << 20), peak
+                print(f"ffmpeg (16 kHz): {segments} segmentos, pico {peak / 2 ** 20:.1f} MB")
+            else:
+                print("ffmpeg/ffprobe não encontrados: caminho do ffmpeg não testado")
+        print('Script rodou com sucesso')
+    except Exception as e:
+        print(f"Erro ao executar o script: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,215 @@
+import struct
+import wave
+from math import gcd
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# Amostras de saída processadas por bloco (limita a memória independentemente da duração)
+BLOCK_FRAMES = 1 << 16
+
+# Filtro anti-aliasing do reamostrador: cruzamentos por zero de cada lado e janela de Kaiser
+# (os mesmos padrões do scipy.signal.resample_poly)
+FILTER_ZERO_CROSSINGS = 10
+KAISER_BETA = 5.0
+
+
+class WavData(NamedTuple):
+    """Localização e formato do chunk "data" de um WAV PCM (inteiro ou float)."""
+    offset: int
+    frames: int
+    sample_rate: int
+    channels: int
+    sample_width: int
+    is_float: bool
+
+
+def read_wav_header(file_path: str) -> Optional[WavData]:
+    """Lê os chunks "fmt " e "data" de um WAV PCM; None para outros formatos (ADPCM, MP3 em WAV...)."""
+    with open(file_path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            return None
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                f.seek(chunk_size & 1, 1)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                available = f.seek(0, 2) - offset
+                data_size = min(chunk_size, available)
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+
+    if fmt is None or len(fmt) < 16:
+        return None
+    format_tag, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if format_tag == 0xFFFE and len(fmt) >= 26:  # WAVE_FORMAT_EXTENSIBLE
+        format_tag = struct.unpack('<H', fmt[24:26])[0]
+    sample_width = (bits + 7) // 8
+    supported = (format_tag == 1 and sample_width in (1, 2, 3, 4)) or (format_tag == 3 and sample_width in (4, 8))
+    if not supported or not channels or block_align != sample_width * channels:
+        return None
+    return WavData(offset, data_size // block_align, sample_rate, channels, sample_width, format_tag == 3)
+
+
+def _as_float(raw: np.ndarray, wav: WavData) -> np.ndarray:
+    """Converte quadros crus (uint8, frames x bytes por quadro) para float32 em [-1, 1), frames x canais."""
+    frames = raw.shape[0]
+    if wav.is_float:
+        return raw.view('<f4' if wav.sample_width == 4 else '<f8').astype(np.float32).reshape(frames, wav.channels)
+    if wav.sample_width == 1:  # 8 bits é sem sinal
+        return (raw.astype(np.float32) - 128.0).reshape(frames, wav.channels) / 128.0
+    if wav.sample_width == 3:  # 24 bits: monta o inteiro de 32 bits a partir dos 3 bytes
+        triples = raw.reshape(frames, wav.channels, 3).astype(np.int32)
+        values = (triples[..., 0] | (triples[..., 1] << 8) | (triples[..., 2] << 16)) << 8 >> 8
+        return values.astype(np.float32) / float(1 << 23)
+    dtype = '<i2' if wav.sample_width == 2 else '<i4'
+    return raw.view(dtype).astype(np.float32).reshape(frames, wav.channels) / float(1 << (8 * wav.sample_width - 1))
+
+
+def polyphase_filter(up: int, down: int) -> np.ndarray:
+    """
+    Filtro passa-baixas (sinc com janela de Kaiser) na taxa sobreamostrada,
+    reorganizado em up fases: linha p = coeficientes h[p], h[p + up], ...
+    """
+    factor = max(up, down)
+    half = FILTER_ZERO_CROSSINGS * factor
+    taps = np.arange(-half, half + 1, dtype=np.float64)
+    h = np.sinc(taps / factor) / factor * np.kaiser(2 * half + 1, KAISER_BETA) * up
+    per_phase = -(-h.size // up)
+    padded = np.zeros(per_phase * up)
+    padded[:h.size] = h
+    return padded.reshape(per_phase, up).T.astype(np.float32)
+
+
+def convert_wav(input_path: str, output_path: str, channels: Optional[int] = 1,
+                sample_rate: Optional[int] = None) -> bool:
+    """
+    Converte um WAV PCM para WAV PCM 16 bits sem subprocessos: o chunk de
+    dados é mapeado em memória (numpy.memmap), os canais são misturados
+    (média) se channels=1, a taxa é convertida por um filtro polifásico
+    (up/down) e a saída é gravada bloco a bloco (memória limitada, qualquer
+    duração). channels e sample_rate None mantêm os da origem.
+    Retorna False se a origem não for um WAV PCM suportado.
+    """
+    wav = read_wav_header(input_path)
+    if wav is None:
+        return False
+    if channels not in (None, 1, wav.channels):
+        raise ValueError(f"Conversão de {wav.channels} para {channels} canais não suportada")
+    out_channels = channels or wav.channels
+    out_rate = sample_rate or wav.sample_rate
+
+    frame_bytes = wav.sample_width * wav.channels
+    downmix = np.full((wav.channels, 1), 1.0 / wav.channels, np.float32)  # média dos canais como produto matricial
+    raw = np.memmap(input_path, dtype=np.uint8, mode='r', offset=wav.offset,
+                    shape=(wav.frames, frame_bytes)) if wav.frames else np.zeros((0, frame_bytes), np.uint8)
+
+    def read(start: int, stop: int) -> np.ndarray:
+        """Quadros [start, stop) em float32, já com a mistura de canais; zeros fora do arquivo."""
+        block = np.zeros((stop - start, out_channels), np.float32)
+        lo, hi = max(start, 0), min(stop, wav.frames)
+        if lo < hi:
+            samples = _as_float(np.asarray(raw[lo:hi]), wav)
+            block[lo - start:hi - start] = samples @ downmix if out_channels == 1 else samples
+        return block
+
+    divisor = gcd(out_rate, wav.sample_rate)
+    up, down = out_rate // divisor, wav.sample_rate // divisor
+
+    with wave.open(output_path, 'wb') as out:
+        out.setnchannels(out_channels)
+        out.setsampwidth(2)
+        out.setframerate(out_rate)
+        if up == down:
+            for start in range(0, wav.frames, BLOCK_FRAMES):
+                _write_block(out, read(start, min(start + BLOCK_FRAMES, wav.frames)))
+            return True
+
+        # A saída n = r + up*q usa sempre a mesma fase p_r do filtro e as entradas
+        # base_r + q*down - k: para cada resto r, as janelas de entrada formam uma
+        # matriz com passo down (visão, sem cópia) multiplicada pelos coeficientes da fase
+        phases = polyphase_filter(up, down)[:, ::-1]
+        taps = phases.shape[1]
+        position = np.arange(up) * down + FILTER_ZERO_CROSSINGS * max(up, down)
+        base, phase = position // up, position % up
+        out_frames = -(-wav.frames * up // down)
+        periods = max(1, BLOCK_FRAMES // up)  # períodos de up saídas por bloco
+
+        for q0 in range(0, -(-out_frames // up), periods):
+            first = q0 * down + int(base.min()) - taps + 1
+            window = read(first, q0 * down + (periods - 1) * down + int(base.max()) + 1)
+            block = np.empty((periods * up, out_channels), np.float32)
+            for channel in range(out_channels):
+                rows = np.lib.stride_tricks.sliding_window_view(np.ascontiguousarray(window[:, channel]), taps)
+                for r in range(up):
+                    start = q0 * down + int(base[r]) - taps + 1 - first
+                    block[r::up, channel] = rows[start:start + (periods - 1) * down + 1:down] @ phases[phase[r]]
+            _write_block(out, block[:out_frames - q0 * up])
+    return True
+
+
+def _write_block(out: wave.Wave_write, block: np.ndarray) -> None:
+    samples = np.clip(np.rint(block * 32768.0), -32768, 32767).astype('<i2')
+    out.writeframes(samples.tobytes())
+
+
+if __name__ == "__main__":
+    # Compara com a conversão do pydub (quando instalado): tempo e pico de memória
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+
+    def measure(function):
+        """Tempo (sem o tracemalloc, que encarece as alocações) e pico de memória de uma conversão."""
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak / 2 ** 20
+
+    def with_pydub(source, target, rate):
+        audio = AudioSegment.from_file(source).set_channels(1)
+        if rate:
+            audio = audio.set_frame_rate(rate)
+        audio.export(target, format='wav')
+
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        AudioSegment = None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "estereo_44k.wav")
+        target = os.path.join(temp_dir, "saida.wav")
+        seconds = 600
+        t = np.arange(44100 * 10) / 44100
+        tone = (0.3 * np.sin(2 * np.pi * 440 * t) + 0.3 * np.sin(2 * np.pi * 9000 * t)).astype(np.float32)
+        stereo = (np.stack([tone, tone * 0.5], axis=1) * 32767).astype('<i2').tobytes()
+        with wave.open(source, 'wb') as wav_file:
+            wav_file.setnchannels(2)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(44100)
+            for _ in range(seconds // 10):
+                wav_file.writeframes(stereo)
+        print(f"origem: {seconds} s, estéreo, 44,1 kHz ({os.path.getsize(source) / 2 ** 20:.0f} MB)")
+
+        for label, rate in (("mono", None), ("mono 16 kHz", 16000)):
+            elapsed, peak = measure(lambda: convert_wav(source, target, channels=1, sample_rate=rate))
+            print(f"numpy  {label:<12}: {elapsed:.2f} s, pico {peak:.1f} MB")
+            if AudioSegment is not None:
+                elapsed, peak = measure(lambda: with_pydub(source, target, rate))
+                print(f"pydub  {label:<12}: {elapsed:.2f} s, pico {peak:.1f} MB")
+        if AudioSegment is None:
+            print("(pydub não instalado: comparação omitida)")
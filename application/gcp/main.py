@@ -1,10 +1,14 @@
 import os
+import sys
 import json
 import time
 from datetime import datetime
 from pathlib import Path
 
 from google.auth.crypt import base
+
+# Pasta application no caminho de importação, para os módulos compartilhados com os outros pipelines
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 from settings.audio_settings import *
 from settings.procces_size_audio import process_large_audio
 from json_scanner import read_json_files, get_filename
@@ -0,0 +1,296 @@
+import os
+import struct
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# Bytes lidos no início/fim do arquivo para achar os cabeçalhos
+HEAD_SIZE = 64 * 1024
+TAIL_SIZE = 64 * 1024
+
+
+class AudioInfo(NamedTuple):
+    """Metadados do áudio lidos dos cabeçalhos (duração em microssegundos)."""
+    duration_us: int
+    sample_rate: int
+    channels: int
+    codec: str
+
+    @property
+    def duration(self) -> float:
+        """Duração em segundos."""
+        return self.duration_us / 1_000_000
+
+
+def _duration_us(samples: int, sample_rate: int) -> int:
+    return samples * 1_000_000 // sample_rate if sample_rate else 0
+
+
+def _skip_id3(f) -> int:
+    """Pula a tag ID3v2 do início (MP3 e alguns FLAC) e retorna a posição do áudio."""
+    f.seek(0)
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+# ============================
+# WAV (RIFF / RF64): chunks "fmt " e "data"
+# ============================
+_WAV_CODECS = {1: 'pcm', 3: 'pcm_float', 6: 'alaw', 7: 'mulaw'}
+
+
+def _probe_wav(f, file_size: int) -> Optional[AudioInfo]:
+    f.seek(0)
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] not in (b'RIFF', b'RF64') or riff[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    data_size = None
+    ds64_data_size = None
+    position = 12
+    while position + 8 <= file_size:
+        f.seek(position)
+        chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+        if chunk_id == b'ds64':
+            ds64_data_size = struct.unpack('<Q', f.read(16)[8:16])[0]
+        elif chunk_id == b'fmt ':
+            fmt = f.read(min(chunk_size, 40))
+        elif chunk_id == b'data':
+            # Tamanho 0xFFFFFFFF (RF64 ou gravação interrompida): usa o ds64 ou o resto do arquivo
+            available = file_size - position - 8
+            if chunk_size == 0xFFFFFFFF:
+                chunk_size = ds64_data_size if ds64_data_size is not None else available
+            data_size = min(chunk_size, available)
+            break
+        position += 8 + chunk_size + (chunk_size & 1)
+
+    if fmt is None or data_size is None or len(fmt) < 16:
+        return None
+    format_tag, channels, sample_rate, _, block_align, _ = struct.unpack('<HHIIHH', fmt[:16])
+    if format_tag == 0xFFFE and len(fmt) >= 26:  # WAVE_FORMAT_EXTENSIBLE: o formato real está no SubFormat
+        format_tag = struct.unpack('<H', fmt[24:26])[0]
+    frames = data_size // block_align if block_align else 0
+    codec = _WAV_CODECS.get(format_tag, f'wav_0x{format_tag:04x}')
+    return AudioInfo(_duration_us(frames, sample_rate), sample_rate, channels, codec)
+
+
+# ============================
+# FLAC: bloco STREAMINFO (sempre o primeiro bloco de metadados)
+# ============================
+def _parse_streaminfo(block: bytes) -> Optional[AudioInfo]:
+    if len(block) < 18:
+        return None
+    packed = int.from_bytes(block[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:  # total desconhecido: precisa decodificar
+        return None
+    return AudioInfo(_duration_us(total_samples, sample_rate), sample_rate, channels, 'flac')
+
+
+def _probe_flac(f, file_size: int) -> Optional[AudioInfo]:
+    f.seek(_skip_id3(f))
+    header = f.read(8)
+    if len(header) < 8 or header[:4] != b'fLaC' or header[4] & 0x7F != 0:
+        return None
+    return _parse_streaminfo(f.read(34))
+
+
+# ============================
+# MP3: cabeçalho Xing/Info ou VBRI; sem eles, taxa de bits constante
+# ============================
+_MP3_BITRATES = {  # kbps por (MPEG-1?, camada)
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+class _Mp3Frame(NamedTuple):
+    sample_rate: int
+    channels: int
+    bitrate: int  # bits por segundo
+    samples: int  # amostras por quadro
+    length: int  # bytes do quadro
+    mpeg1: bool
+
+
+def _parse_mp3_header(header: bytes) -> Optional[_Mp3Frame]:
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x3  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    layer = 4 - ((header[1] >> 1) & 0x3)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x1
+    channels = 1 if header[3] >> 6 == 3 else 2
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == 3 and not mpeg1 else 1152
+        length = samples // 8 * bitrate // sample_rate + padding
+    return _Mp3Frame(sample_rate, channels, bitrate, samples, length, mpeg1)
+
+
+def _probe_mp3(f, file_size: int) -> Optional[AudioInfo]:
+    start = _skip_id3(f)
+    f.seek(start)
+    head = f.read(HEAD_SIZE)
+
+    # Primeiro quadro válido seguido de outro quadro válido (evita sincronismos falsos)
+    frame = None
+    offset = head.find(b'\xFF')
+    while 0 <= offset < len(head) - 4:
+        frame = _parse_mp3_header(head[offset:offset + 4])
+        if frame is not None:
+            following = head[offset + frame.length:offset + frame.length + 4]
+            if len(following) < 4 or _parse_mp3_header(following) is not None:
+                break
+        frame = None
+        offset = head.find(b'\xFF', offset + 1)
+    if frame is None:
+        return None
+
+    # Cabeçalho Xing/Info logo após o side information do primeiro quadro
+    side_info = (32 if frame.channels == 2 else 17) if frame.mpeg1 else (17 if frame.channels == 2 else 9)
+    xing = head[offset + 4 + side_info:offset + 4 + side_info + 12]
+    if xing[:4] in (b'Xing', b'Info') and len(xing) == 12 and xing[7] & 0x1:
+        frames = struct.unpack('>I', xing[8:12])[0]
+        return AudioInfo(_duration_us(frames * frame.samples, frame.sample_rate), frame.sample_rate,
+                         frame.channels, 'mp3')
+
+    # Cabeçalho VBRI (Fraunhofer), sempre 32 bytes após o cabeçalho do quadro
+    vbri = head[offset + 36:offset + 54]
+    if vbri[:4] == b'VBRI' and len(vbri) == 18:
+        frames = struct.unpack('>I', vbri[14:18])[0]
+        return AudioInfo(_duration_us(frames * frame.samples, frame.sample_rate), frame.sample_rate,
+                         frame.channels, 'mp3')
+
+    # Taxa constante: bytes de áudio (sem a tag ID3v1 do fim) / taxa de bits
+    audio_bytes = file_size - start - offset
+    f.seek(max(file_size - 128, 0))
+    if f.read(3) == b'TAG':
+        audio_bytes -= 128
+    return AudioInfo(audio_bytes * 8 * 1_000_000 // frame.bitrate, frame.sample_rate, frame.channels, 'mp3')
+
+
+# ============================
+# Ogg (Opus, Vorbis, FLAC): cabeçalho do primeiro pacote e granule position da última página
+# ============================
+def _last_granule(f, file_size: int, serial: bytes) -> Optional[int]:
+    """Granule position da última página do fluxo, lendo o arquivo de trás para frente."""
+    end = file_size
+    while end > 0:
+        start = max(0, end - TAIL_SIZE)
+        f.seek(start)
+        tail = f.read(end - start + 27)  # sobreposição para páginas que cruzam o limite do bloco
+        position = tail.rfind(b'OggS', 0, end - start)
+        while position >= 0:
+            page = tail[position:position + 18]
+            if len(page) == 18 and page[14:18] == serial:
+                granule = struct.unpack('<q', page[6:14])[0]
+                if granule >= 0:  # -1: página sem pacote completo
+                    return granule
+            position = tail.rfind(b'OggS', 0, position)
+        end = start
+    return None
+
+
+def _probe_ogg(f, file_size: int) -> Optional[AudioInfo]:
+    f.seek(0)
+    page = f.read(27 + 255)
+    if len(page) < 28 or page[:4] != b'OggS':
+        return None
+    serial = page[14:18]
+    f.seek(27 + page[26])  # início do primeiro pacote, depois da tabela de segmentos
+    packet = f.read(64)
+
+    if packet[:8] == b'OpusHead' and len(packet) >= 19:
+        channels = packet[9]
+        pre_skip = struct.unpack('<H', packet[10:12])[0]
+        # O Opus é sempre decodificado a 48 kHz (a taxa original do cabeçalho é só informativa)
+        sample_rate, skip, codec = 48000, pre_skip, 'opus'
+    elif packet[:7] == b'\x01vorbis' and len(packet) >= 16:
+        channels = packet[11]
+        sample_rate = struct.unpack('<I', packet[12:16])[0]
+        skip, codec = 0, 'vorbis'
+    elif packet[:5] == b'\x7fFLAC' and packet[9:13] == b'fLaC':
+        info = _parse_streaminfo(packet[17:51])
+        sample_rate, channels = (info.sample_rate, info.channels) if info else (0, 0)
+        skip, codec = 0, 'flac'
+    else:
+        return None
+
+    granule = _last_granule(f, file_size, serial)
+    if granule is None or not sample_rate:
+        return None
+    return AudioInfo(_duration_us(max(granule - skip, 0), sample_rate), sample_rate, channels, codec)
+
+
+_PROBES = {
+    '.wav': _probe_wav, '.wave': _probe_wav,
+    '.flac': _probe_flac,
+    '.mp3': _probe_mp3,
+    '.ogg': _probe_ogg, '.opus': _probe_ogg, '.oga': _probe_ogg,
+}
+
+
+def _decode_info(file_path: str) -> AudioInfo:
+    """Último recurso para formatos desconhecidos: decodifica o arquivo inteiro com o pydub."""
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(file_path)
+    codec = os.path.splitext(file_path)[1].lower().lstrip('.') or 'desconhecido'
+    return AudioInfo(len(audio) * 1000, audio.frame_rate, audio.channels, codec)
+
+
+@lru_cache(maxsize=1024)
+def _probe(file_path: str, size: int, mtime_ns: int) -> AudioInfo:
+    """Memoizado por (caminho, tamanho, mtime): um arquivo alterado é lido de novo."""
+    ext = os.path.splitext(file_path)[1].lower()
+    # A extensão pode mentir: antes de decodificar, tenta os formatos que têm assinatura no início
+    candidates = [_PROBES[ext]] if ext in _PROBES else []
+    candidates += [probe for probe in (_probe_wav, _probe_flac, _probe_ogg) if probe not in candidates]
+    with open(file_path, 'rb') as f:
+        for probe in candidates:
+            info = probe(f, size)
+            if info is not None:
+                return info
+    return _decode_info(file_path)
+
+
+def probe_audio(file_path: str) -> AudioInfo:
+    """
+    Lê duração (em microssegundos), taxa de amostragem, canais e codec só dos
+    cabeçalhos do arquivo (WAV, FLAC, MP3, Ogg), sem decodificar o áudio.
+    Formatos desconhecidos são decodificados por completo (pydub).
+    """
+    stat = os.stat(file_path)
+    return _probe(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+if __name__ == "__main__":
+    # Mostra os metadados e o tempo de leitura dos arquivos passados na linha de comando
+    import sys
+    import time
+
+    for path in sys.argv[1:]:
+        start = time.perf_counter()
+        info = probe_audio(path)
+        elapsed = time.perf_counter() - start
+        print(f"{path}: {info.duration:.3f} s, {info.sample_rate} Hz, {info.channels} canal(is), "
+              f"{info.codec} ({elapsed * 1000:.2f} ms)")
@@ -1,14 +1,18 @@
 import os
 import json
 from textwrap import indent
-import wave
 from pydub import AudioSegment
-from mutagen.mp3 import MP3
 from google.cloud import speech_v1 as speech
 from google.cloud import storage
 
 from dotenv import load_dotenv
 
+from .audio_probe import probe_audio
+
+# application/common entra no caminho de importação pelo ponto de entrada (gcp/main.py)
+from common.audio_cache import AudioCache
+from common.wav_convert import convert_wav
+
 load_dotenv()
 GCP_CLIENT_KEY = os.getenv("KEY_SPEECH_CLIENT")
 BUCKET_NAME = os.getenv("BUCKET_NAME") 
@@ -24,42 +28,41 @@ speech_client = speech.SpeechClient.from_service_account_file(credentials_path)
 # Cliente Cloud Storage
 storage_client = storage.Client.from_service_account_info(credentials_info)
 
+# Cache de áudios pré-processados (compartilhado com o pipeline do GPT)
+audio_cache = AudioCache()
+
 def convert_to_mono(input_file, output_file):
-    """Converte o áudio para mono."""
-    audio = AudioSegment.from_file(input_file)
-    audio = audio.set_channels(1)
-    audio.export(output_file, format='wav')
+    """Converte o áudio para mono (WAV PCM 16 bits): WAV PCM em processo com NumPy, demais formatos pelo pydub."""
+    if not convert_wav(input_file, output_file, channels=1):
+        audio = AudioSegment.from_file(input_file)
+        audio = audio.set_channels(1).set_sample_width(2)
+        audio.export(output_file, format='wav')
     print(f"Convertido para mono: {output_file}")
     return output_file
 
 def get_audio_duration(file_path):
-    """Obtém a duração do arquivo de áudio em segundos."""
-    ext = os.path.splitext(file_path)[1].lower()
+    """Obtém a duração do arquivo de áudio em segundos (só lendo os cabeçalhos)."""
     try:
-        # Verufica se o arquivo é mp3 para utilizar a biblitoteca "mutagen"
-        if ext == ".mp3":
-            return MP3(file_path).info.length
-        
-        # Se não for, utiliza a biblioteca "pydub"
-        return len(AudioSegment.from_file(file_path)) / 1000.0
- # Converter de ms para segundos
+        return probe_audio(file_path).duration
     except Exception as e:
         print(f"Erro ao obter duração do arquivo {file_path}: {e}")
         return 0
 
+def get_sample_rate(file_path):
+    """Obtém a taxa de amostragem do arquivo a partir dos cabeçalhos (WAV, FLAC, MP3, Ogg)."""
+    try:
+        return probe_audio(file_path).sample_rate
+    except Exception as e:
+        print(f"Erro ao ler taxa de amostragem do arquivo {file_path}: {e}")
+        return None # Retorna None se falhar
+
 def get_wav_sample_rate(file_path):
     """Obtém a taxa de amostragem de um arquivo WAV."""
-    with wave.open(file_path, 'rb') as wav_file:
-        return wav_file.getframerate()
+    return probe_audio(file_path).sample_rate
 
 def get_mp3_sample_rate(file_path):
-    """Obtém a taxa de amostragem de um arquivo MP3 usando Mutagen."""
-    try:
-        audio_info = MP3(file_path).info
-        return audio_info.sample_rate
-    except Exception as e:
-        print(f"Erro ao ler taxa de amostragem do MP3 com Mutagen: {e}")
-        return None # Retorna None se falhar
+    """Obtém a taxa de amostragem de um arquivo MP3."""
+    return get_sample_rate(file_path)
 
 def upload_audio_to_storage(audio_file_path):
     """Faz upload do arquivo de áudio para o Google Cloud Storage."""
@@ -112,11 +115,8 @@ def transcribe_audio_from_storage(gcs_uri, encoding, sample_rate):
 def transcribe_audio(audio_file, encoding, sample_rate):
     """Transcreve um arquivo de áudio usando a API Speech-to-Text (método direto para arquivos pequenos)."""
     try:
-        with open(audio_file, 'rb') as audio:
-            content = audio.read()
-        
-        # Verificar tamanho do arquivo (limite de 10MB)
-        file_size_mb = len(content) / (1024 * 1024)
+        # Verificar tamanho do arquivo (limite de 10MB) e duração pelos cabeçalhos, antes de ler o conteúdo
+        file_size_mb = os.path.getsize(audio_file) / (1024 * 1024)
         print(f"📊 Tamanho do arquivo: {file_size_mb:.2f} MB")
         
         duration_sec = get_audio_duration(audio_file)
@@ -129,6 +129,8 @@ def transcribe_audio(audio_file, encoding, sample_rate):
                 return None
         
         # Para arquivos pequenos, usar método direto
+        with open(audio_file, 'rb') as audio:
+            content = audio.read()
         audio_obj = speech.RecognitionAudio(content=content)
         config = speech.RecognitionConfig(
             encoding=encoding,
@@ -156,17 +158,17 @@ def process_audio(input_file, output_dir):
     file_name, file_ext = os.path.splitext(input_file)
 
     if file_ext == '.wav':
-        # Usar o diretório de saída para arquivos mono temporários
-        mono_file = os.path.join('settings/temp', f'{os.path.basename(file_name)}_mono.wav')
-        if not os.path.exists(mono_file):
-            print(f"Criando arquivo mono: {mono_file}")
-            convert_to_mono(input_file, mono_file)
+        # Cópia mono no cache (chave = conteúdo do áudio + parâmetros), convertida uma única vez
+        mono_file = audio_cache.convert(input_file, convert_to_mono, channels=1, codec='pcm_s16le')
+        if mono_file is None:
+            print(f"Falha ao converter para mono: {input_file}")
+            return None
         sample_rate = get_wav_sample_rate(input_file)
         encoding = speech.RecognitionConfig.AudioEncoding.LINEAR16
         return transcribe_audio(mono_file, encoding, sample_rate)
     elif file_ext == '.flac':
         encoding = speech.RecognitionConfig.AudioEncoding.FLAC
-        sample_rate = AudioSegment.from_file(input_file).frame_rate
+        sample_rate = get_sample_rate(input_file)
         return transcribe_audio(input_file, encoding, sample_rate)
     elif file_ext == '.mp3':
         print("Entrei aqui quando o arquivo é mp3")
@@ -176,7 +178,7 @@ def process_audio(input_file, output_dir):
         return transcribe_audio(input_file, encoding, sample_rate)
     elif file_ext == '.ogg':
         encoding = speech.RecognitionConfig.AudioEncoding.OGG_OPUS
-        sample_rate = AudioSegment.from_file(input_file).frame_rate
+        sample_rate = get_sample_rate(input_file)
         return transcribe_audio(input_file, encoding, sample_rate)
     else:
         return None
@@ -2,28 +2,22 @@ import os
 
 from .audio_settings import *
 from pydub import AudioSegment
+from common.audio_stream import iter_pcm_segments
 
 def split_audio(input_file, segment_duration_ms=300000):  # 5 minutos em milissegundos
-    """Divide um arquivo de áudio em segmentos."""
-    audio = AudioSegment.from_file(input_file)
-    total_duration_ms = len(audio)
-    segments = []
-    start_ms = 0
-    while start_ms < total_duration_ms:
-        end_ms = min(start_ms + segment_duration_ms, total_duration_ms)
-        segment = audio[start_ms:end_ms]
-        segments.append(segment)
-        start_ms = end_ms
-    return segments
+    """Gera os segmentos do arquivo de áudio um a um, decodificando em fluxo (só o segmento atual em memória)."""
+    # Formato da origem: cabeçalho do WAV ou ffprobe, sem decodificar o arquivo antes do fluxo
+    for data, fmt in iter_pcm_segments(input_file, segment_duration_ms / 1000):
+        yield AudioSegment(data=data, sample_width=fmt.sample_width, frame_rate=fmt.sample_rate,
+                           channels=fmt.channels)
 
 def process_large_audio(input_file, output_dir):
     """Processa arquivos de áudio grandes dividindo-os em segmentos."""
-    segments = split_audio(input_file)
     transcriptions = []
-    for i, segment in enumerate(segments):
+    for i, segment in enumerate(split_audio(input_file)):
         segment_file = os.path.join(output_dir, f"segment_{i}.wav")
         segment.export(segment_file, format="wav")
         transcription = transcribe_audio(segment_file, speech.RecognitionConfig.AudioEncoding.LINEAR16, get_wav_sample_rate(segment_file))
         transcriptions.append(transcription)
         os.remove(segment_file) #remove os arquivos temporarios.
-    return " ".join(transcriptions)
\ No newline at end of file
+    return " ".join(transcriptions)
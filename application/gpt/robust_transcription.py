@@ -1,4 +1,5 @@
 import os
+import sys
 import base64
 import json
 import time
@@ -7,9 +8,15 @@ from pathlib import Path
 from typing import List, Optional, Dict, Any
 import subprocess
 import tempfile
+import wave
 from openai import AzureOpenAI
 from dotenv import load_dotenv
 
+# Pasta application no caminho de importação, para os módulos compartilhados com os outros pipelines
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from common.audio_cache import AudioCache
+from common.wav_convert import convert_wav
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -33,6 +40,9 @@ class RobustAudioTranscriber:
         self.max_file_size_mb = 25  # Limite do GPT-4o-audio-preview
         self.chunk_duration_seconds = 300  # 5 minutos por chunk
         
+        # Cache de conversões (compartilhado com o pipeline do GCP e entre execuções)
+        self.audio_cache = AudioCache()
+        
         # Inicializar cliente OpenAI
         self.client = AzureOpenAI(
             azure_endpoint=self.endpoint,
@@ -97,8 +107,13 @@ class RobustAudioTranscriber:
             return False
 
     def _convert_audio_format(self, input_path: str, output_path: str, target_format: str = "wav") -> bool:
-        """Converte arquivo de áudio para formato compatível usando ffmpeg."""
+        """Converte arquivo de áudio para WAV 16 kHz mono (WAV PCM em processo com NumPy, demais formatos com ffmpeg)."""
         try:
+            # WAV PCM: mistura de canais e reamostragem polifásica sem subprocesso
+            if convert_wav(input_path, output_path, channels=1, sample_rate=16000):
+                logger.info(f"Conversão bem-sucedida (em processo): {output_path}")
+                return True
+            
             # Verificar se ffmpeg está disponível
             subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
             
@@ -130,64 +145,74 @@ class RobustAudioTranscriber:
             logger.error(f"Erro na conversão de áudio: {e}")
             return False
 
-    def _split_audio_file(self, input_path: str, chunk_duration: int = 300) -> List[str]:
-        """Divide arquivo de áudio em chunks menores."""
+    def _split_audio_file(self, input_path: str, output_dir: str, chunk_duration: int = 300) -> List[str]:
+        """Divide arquivo de áudio em chunks menores (WAV 16 kHz mono) em output_dir, em uma única passada."""
         try:
+            # WAV já no formato dos chunks (ex.: saída do cache de conversões): fatia o PCM direto
+            if self._is_chunk_format(input_path):
+                return self._slice_wav(input_path, chunk_duration, output_dir)
+            
             # Verificar se ffmpeg está disponível
             subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
             
-            chunk_files = []
-            temp_dir = tempfile.mkdtemp()
-            
-            # Obter duração total do áudio
-            cmd_duration = [
-                "ffprobe",
-                "-v", "quiet",
-                "-show_entries", "format=duration",
-                "-of", "csv=p=0",
-                input_path
+            # Um único ffmpeg decodifica o arquivo uma vez e grava todos os chunks (segment muxer),
+            # em vez de um processo por chunk decodificando desde o início
+            cmd_split = [
+                "ffmpeg",
+                "-i", input_path,
+                "-f", "segment",
+                "-segment_time", str(chunk_duration),
+                "-reset_timestamps", "1",
+                "-acodec", "pcm_s16le",
+                "-ar", "16000",
+                "-ac", "1",
+                "-y",
+                os.path.join(output_dir, "chunk_%03d.wav")
             ]
             
-            result = subprocess.run(cmd_duration, capture_output=True, text=True)
+            result = subprocess.run(cmd_split, capture_output=True, text=True)
             if result.returncode != 0:
-                logger.error(f"Erro ao obter duração do áudio: {result.stderr}")
+                logger.error(f"Erro ao dividir o áudio: {result.stderr}")
                 return []
             
-            total_duration = float(result.stdout.strip())
-            logger.info(f"Duração total do áudio: {total_duration:.2f} segundos")
-            
-            # Dividir em chunks
-            chunk_count = int(total_duration / chunk_duration) + 1
-            
-            for i in range(chunk_count):
-                start_time = i * chunk_duration
-                chunk_path = os.path.join(temp_dir, f"chunk_{i:03d}.wav")
-                
-                cmd_split = [
-                    "ffmpeg",
-                    "-i", input_path,
-                    "-ss", str(start_time),
-                    "-t", str(chunk_duration),
-                    "-acodec", "pcm_s16le",
-                    "-ar", "16000",
-                    "-ac", "1",
-                    "-y",
-                    chunk_path
-                ]
-                
-                result = subprocess.run(cmd_split, capture_output=True, text=True)
-                if result.returncode == 0:
-                    chunk_files.append(chunk_path)
-                    logger.info(f"Chunk {i+1}/{chunk_count} criado: {chunk_path}")
-                else:
-                    logger.error(f"Erro ao criar chunk {i+1}: {result.stderr}")
-            
+            chunk_files = sorted(
+                os.path.join(output_dir, name) for name in os.listdir(output_dir)
+                if name.startswith("chunk_") and name.endswith(".wav")
+            )
+            logger.info(f"{len(chunk_files)} chunks criados em {output_dir}")
             return chunk_files
             
         except Exception as e:
             logger.error(f"Erro na divisão do áudio: {e}")
             return []
 
+    @staticmethod
+    def _is_chunk_format(file_path: str) -> bool:
+        """Verifica se o arquivo é WAV PCM 16 bits, mono, 16 kHz (formato dos chunks)."""
+        try:
+            with wave.open(file_path, 'rb') as wav_file:
+                return (wav_file.getsampwidth(), wav_file.getnchannels(), wav_file.getframerate()) == (2, 1, 16000)
+        except (wave.Error, EOFError):
+            return False
+
+    def _slice_wav(self, input_path: str, chunk_duration: int, output_dir: str) -> List[str]:
+        """Fatia um WAV PCM em chunks lendo os quadros em sequência (sem decodificar nem reamostrar)."""
+        chunk_files = []
+        with wave.open(input_path, 'rb') as wav_file:
+            params = wav_file.getparams()
+            frames_per_chunk = chunk_duration * params.framerate
+            while True:
+                frames = wav_file.readframes(frames_per_chunk)
+                if not frames:
+                    break
+                chunk_path = os.path.join(output_dir, f"chunk_{len(chunk_files):03d}.wav")
+                with wave.open(chunk_path, 'wb') as chunk:
+                    chunk.setparams(params)
+                    chunk.writeframes(frames)
+                chunk_files.append(chunk_path)
+        logger.info(f"{len(chunk_files)} chunks fatiados de {input_path}")
+        return chunk_files
+
     def _transcribe_audio_chunk(self, audio_data: bytes, file_extension: str, chunk_index: int = 0) -> Optional[str]:
         """Transcreve um chunk de áudio usando GPT-4o-audio-preview."""
         max_retries = 3
@@ -305,63 +330,52 @@ Transcreva agora:"""
                 # Arquivo grande - dividir em chunks
                 logger.info("Arquivo grande - tentando dividir em chunks")
                 
-                # Converter para formato compatível se necessário
+                # Converter para WAV 16 kHz mono se necessário (os chunks são fatiados direto desse WAV)
                 temp_file = audio_file_path
-                if file_extension not in ["wav", "mp3"]:
-                    temp_file = tempfile.mktemp(suffix=".wav")
-                    if not self._convert_audio_format(audio_file_path, temp_file):
+                if file_extension != "mp3" and not self._is_chunk_format(audio_file_path):
+                    temp_file = self.audio_cache.convert(audio_file_path, self._convert_audio_format,
+                                                         channels=1, sample_rate=16000, codec="pcm_s16le")
+                    if temp_file is None:
                         logger.error("Falha na conversão do arquivo")
                         return False
                 
-                # Dividir em chunks
-                chunk_files = self._split_audio_file(temp_file, self.chunk_duration_seconds)
+                # Dividir em chunks (pasta temporária apagada ao sair do bloco, mesmo em caso de erro)
+                with tempfile.TemporaryDirectory(prefix="gpt_chunks_") as chunk_dir:
+                    chunk_files = self._split_audio_file(temp_file, chunk_dir, self.chunk_duration_seconds)
                 
-                if not chunk_files:
-                    logger.error("Falha ao dividir arquivo em chunks - FFmpeg pode não estar instalado")
-                    logger.info("Para processar arquivos grandes, instale FFmpeg:")
-                    logger.info("Windows: choco install ffmpeg")
-                    logger.info("Ubuntu: sudo apt install ffmpeg")
-                    logger.info("macOS: brew install ffmpeg")
+                    if not chunk_files:
+                        logger.error("Falha ao dividir arquivo em chunks - FFmpeg pode não estar instalado")
+                        logger.info("Para processar arquivos grandes, instale FFmpeg:")
+                        logger.info("Windows: choco install ffmpeg")
+                        logger.info("Ubuntu: sudo apt install ffmpeg")
+                        logger.info("macOS: brew install ffmpeg")
                     
-                    # Tentar transcrever o arquivo inteiro mesmo sendo grande (pode falhar)
-                    logger.warning("Tentando transcrever arquivo grande sem divisão (pode falhar)...")
-                    try:
-                        with open(audio_file_path, 'rb') as audio_reader:
-                            audio_data = base64.b64encode(audio_reader.read()).decode('utf-8')
+                        # Tentar transcrever o arquivo inteiro mesmo sendo grande (pode falhar)
+                        logger.warning("Tentando transcrever arquivo grande sem divisão (pode falhar)...")
+                        try:
+                            with open(audio_file_path, 'rb') as audio_reader:
+                                audio_data = base64.b64encode(audio_reader.read()).decode('utf-8')
                         
-                        transcription = self._transcribe_audio_chunk(audio_data, file_extension)
-                        if transcription:
-                            transcriptions.append(transcription)
-                        else:
-                            logger.error("Falha na transcrição do arquivo grande")
+                            transcription = self._transcribe_audio_chunk(audio_data, file_extension)
+                            if transcription:
+                                transcriptions.append(transcription)
+                            else:
+                                logger.error("Falha na transcrição do arquivo grande")
+                                return False
+                        except Exception as e:
+                            logger.error(f"Erro ao tentar transcrever arquivo grande: {e}")
                             return False
-                    except Exception as e:
-                        logger.error(f"Erro ao tentar transcrever arquivo grande: {e}")
-                        return False
-                else:
-                    # Transcrever cada chunk
-                    for i, chunk_file in enumerate(chunk_files):
-                        logger.info(f"Transcrevendo chunk {i+1}/{len(chunk_files)}")
+                    else:
+                        # Transcrever cada chunk
+                        for i, chunk_file in enumerate(chunk_files):
+                            logger.info(f"Transcrevendo chunk {i+1}/{len(chunk_files)}")
                         
-                        with open(chunk_file, 'rb') as chunk_reader:
-                            chunk_data = base64.b64encode(chunk_reader.read()).decode('utf-8')
+                            with open(chunk_file, 'rb') as chunk_reader:
+                                chunk_data = base64.b64encode(chunk_reader.read()).decode('utf-8')
                         
-                        chunk_transcription = self._transcribe_audio_chunk(chunk_data, "wav", i)
-                        if chunk_transcription:
-                            transcriptions.append(f"[Chunk {i+1}] {chunk_transcription}")
-                        
-                        # Limpar arquivo temporário do chunk
-                        try:
-                            os.remove(chunk_file)
-                        except:
-                            pass
-                
-                # Limpar arquivo temporário se foi criado
-                if temp_file != audio_file_path:
-                    try:
-                        os.remove(temp_file)
-                    except:
-                        pass
+                            chunk_transcription = self._transcribe_audio_chunk(chunk_data, "wav", i)
+                            if chunk_transcription:
+                                transcriptions.append(f"[Chunk {i+1}] {chunk_transcription}")
             
             # Salvar transcrição final
             if transcriptions: